@@ -0,0 +1,213 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import config
+from optimizers import GreedySolver, GeneticOptimizer
+
+CSV_FIELDS = [
+    'year', 'gp', 'status', 'error', 'total_laps', 'pit_loss',
+    'greedy_time', 'greedy_strategy', 'ga_time', 'ga_strategy',
+    'load_s', 'fit_s', 'greedy_s', 'ga_s', 'total_s',
+]
+
+def parse_years(tokens):
+    """ Accepts single years and inclusive ranges: ['2019-2021', '2024'] -> [2019, 2020, 2021, 2024]. """
+    years = []
+    for token in tokens:
+        if '-' in token:
+            start, end = token.split('-', 1)
+            years.extend(range(int(start), int(end) + 1))
+        else:
+            years.append(int(token))
+    return years
+
+def build_events(years=None, gps=None, pairs=None):
+    """
+    Expands the batch definition into (year, gp) pairs:
+    - pairs: explicit "YEAR:GP" strings;
+    - years + gps: every listed GP in every listed year;
+    - years only: whole seasons from the FastF1 schedule (downloaded concurrently).
+    """
+    events = []
+    for pair in pairs or []:
+        year, gp = pair.split(':', 1)
+        events.append((int(year), gp.strip()))
+    if years and not gps:
+        from prefetch import SessionPrefetcher
+        events.extend(SessionPrefetcher().season_events(years))
+    for year in (years or []) if gps else []:
+        events.extend((year, gp) for gp in gps)
+    return events
+
+def load_event(year, gp, use_cache=True):
+    """
+    I/O-BOUND STAGE (thread pool)
+    Downloads/cleans the session and fits the degradation models.
+    """
+    from data_model import TyreDataModeler
+    from model_cache import ModelCache
+
+    timings = {}
+    t0 = time.perf_counter()
+    engine = TyreDataModeler(year, gp, cache=ModelCache() if use_cache else None)
+    engine.load_and_clean_data()
+    timings['load_s'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    engine.analyze_degradation()
+    tyre_models, total_laps, pit_loss = engine.get_simulation_data()
+    timings['fit_s'] = time.perf_counter() - t0
+
+    # Plain floats only: the result is shipped to a solver process
+    tyre_models = {comp: {k: float(v) for k, v in m.items()} for comp, m in tyre_models.items()}
+    return tyre_models, int(total_laps), float(pit_loss), timings
+
+def solve_event(tyre_models, total_laps, pit_loss):
+    """
+    CPU-BOUND STAGE (process pool)
+    Greedy baseline + Genetic Algorithm, seeded like main.py.
+    """
+    random.seed(config.RANDOM_SEED)
+    np.random.seed(config.RANDOM_SEED)
+    result = {}
+
+    t0 = time.perf_counter()
+    greedy_time, greedy_stints = GreedySolver(tyre_models, total_laps, pit_loss=pit_loss).solve()
+    result['greedy_s'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    best = GeneticOptimizer(tyre_models, total_laps, pit_loss=pit_loss).run()
+    result['ga_s'] = time.perf_counter() - t0
+
+    result.update({
+        'greedy_time': float(greedy_time),
+        'greedy_strategy': greedy_stints,
+        'ga_time': float(best.fitness),
+        'ga_strategy': best.genes,
+    })
+    return result
+
+class ResultWriter:
+    """ Streams one summary row per event to a JSONL or CSV file. """
+    def __init__(self, path, fmt='jsonl'):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown output format '{fmt}' (choose 'jsonl' or 'csv')")
+        self.fmt = fmt
+        self.file = open(path, 'w', newline='')
+        self.csv = None
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == 'jsonl':
+            self.file.write(json.dumps(row) + '\n')
+        else:
+            flat = {k: row.get(k) for k in CSV_FIELDS}
+            for k in ('greedy_strategy', 'ga_strategy'):
+                if flat[k] is not None:
+                    flat[k] = json.dumps(flat[k])
+            self.csv.writerow(flat)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def run_batch(events, out_path, fmt='jsonl', loaders=2, solvers=None, max_pending=4, use_cache=True):
+    """
+    BOUNDED PIPELINE
+    Loading runs in a thread pool and overlaps with optimisation in a process
+    pool. At most `max_pending` events are in flight (loading, waiting or
+    solving) at any time, which bounds memory on season-wide runs.
+    Solver processes are spawned, not forked: the pool starts its workers on
+    the first submit, when the loader threads are already inside FastF1 and
+    requests, and forking a multi-threaded process can deadlock.
+    Returns the list of summary rows, in completion order.
+    """
+    solvers = solvers or os.cpu_count() or 1
+    writer = ResultWriter(out_path, fmt)
+    rows = []
+    queue = iter(events)
+    loading, solving = {}, {}
+    spawn = multiprocessing.get_context('spawn')
+
+    with ThreadPoolExecutor(max_workers=loaders) as load_pool, \
+            ProcessPoolExecutor(max_workers=solvers, mp_context=spawn) as solve_pool:
+
+        def fill():
+            while len(loading) + len(solving) < max_pending:
+                event = next(queue, None)
+                if event is None:
+                    return
+                year, gp = event
+                row = {'year': year, 'gp': gp, 'started': time.perf_counter()}
+                loading[load_pool.submit(load_event, year, gp, use_cache)] = row
+
+        def finish(row, error=None):
+            row['total_s'] = time.perf_counter() - row.pop('started')
+            row['status'] = 'error' if error else 'ok'
+            row['error'] = error
+            writer.write(row)
+            rows.append(row)
+            print(f"[{row['status'].upper()}] {row['gp']} {row['year']} ({row['total_s']:.1f}s)")
+
+        fill()
+        try:
+            while loading or solving:
+                done, _ = wait(list(loading) + list(solving), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in loading:
+                        row = loading.pop(future)
+                        try:
+                            tyre_models, total_laps, pit_loss, timings = future.result()
+                        except Exception as e:
+                            finish(row, error=f"load: {e}")
+                            continue
+                        row.update(timings)
+                        row.update({'total_laps': total_laps, 'pit_loss': pit_loss})
+                        solving[solve_pool.submit(solve_event, tyre_models, total_laps, pit_loss)] = row
+                    else:
+                        row = solving.pop(future)
+                        try:
+                            row.update(future.result())
+                        except Exception as e:
+                            finish(row, error=f"solve: {e}")
+                            continue
+                        finish(row)
+                fill()
+        finally:
+            writer.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Non-interactive season-wide strategy optimisation.")
+    parser.add_argument('--years', nargs='*', default=[], help="Seasons or ranges, e.g. 2023 2019-2021")
+    parser.add_argument('--gps', nargs='*', default=None, help="Grand Prix names (default: whole season)")
+    parser.add_argument('--events', nargs='*', default=[], help="Explicit YEAR:GP pairs, e.g. 2024:Monza")
+    parser.add_argument('--out', default='batch_results.jsonl', help="Summary file")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default=None, help="Default: from --out extension")
+    parser.add_argument('--loaders', type=int, default=2, help="Concurrent session downloads")
+    parser.add_argument('--solvers', type=int, default=None, help="Optimiser processes (default: CPU cores)")
+    parser.add_argument('--max-pending', type=int, default=4, help="Events in flight at once")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the fitted-model cache")
+    args = parser.parse_args()
+
+    events = build_events(parse_years(args.years), args.gps, args.events)
+    if not events:
+        parser.error("nothing to do: give --years and/or --events")
+    fmt = args.format or ('csv' if args.out.endswith('.csv') else 'jsonl')
+
+    print(f"Batch: {len(events)} events -> {args.out}")
+    rows = run_batch(events, args.out, fmt=fmt, loaders=args.loaders, solvers=args.solvers,
+                     max_pending=args.max_pending, use_cache=not args.no_cache)
+    failed = sum(1 for r in rows if r['status'] != 'ok')
+    print(f"Done: {len(rows) - failed} ok, {failed} failed.")
+
+if __name__ == "__main__":
+    main()
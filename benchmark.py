@@ -0,0 +1,250 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+import config
+from optimizers import (GreedySolver, GeneticOptimizer, ExactSolver, StintCostTable,
+                        StrategyIndividual, evaluate_population)
+from live import LivePlanner, RaceState
+
+# --- SYNTHETIC SCENARIOS (lap count, pit loss, degradation spread) ---
+SCENARIOS = [
+    {'name': 'short-low-deg', 'total_laps': 44, 'pit_loss': 19.0, 'deg_spread': 0.5},
+    {'name': 'mid-balanced', 'total_laps': 57, 'pit_loss': 22.0, 'deg_spread': 1.0},
+    {'name': 'long-high-deg', 'total_laps': 70, 'pit_loss': 24.0, 'deg_spread': 2.0},
+    {'name': 'marathon', 'total_laps': 78, 'pit_loss': 28.0, 'deg_spread': 1.5},
+]
+
+# Metrics where a higher value is better (everything else: lower is better)
+HIGHER_IS_BETTER = {'fitness_evals_per_s', 'batch_evals_per_s'}
+
+# Absolute noise floors: a change smaller than this is never a regression,
+# whatever the relative difference (timer resolution, scheduler jitter)
+NOISE_FLOOR = {
+    's': 0.002,     # *_s timings and the time of one throughput batch (2 ms)
+    'ms': 20.0,     # *_ms re-plan latencies (a quarter of the 80 ms re-plan budget)
+    'kb': 256.0,    # *_kb memory
+}
+
+# Minimum total duration of one timing sample (seconds)
+MIN_SAMPLE_TIME = 0.05
+
+def synthetic_models(deg_spread=1.0, base_pace=90.0, seed=config.RANDOM_SEED):
+    """
+    Builds a tyre_models dict shaped like TyreDataModeler's output: softer
+    compounds are faster but degrade faster, scaled by `deg_spread`.
+    """
+    rng = random.Random(seed)
+    return {
+        'SOFT': {'base_pace': base_pace, 'degradation': 0.08 * deg_spread + rng.uniform(0, 0.01)},
+        'MEDIUM': {'base_pace': base_pace + 0.6, 'degradation': 0.05 * deg_spread + rng.uniform(0, 0.01)},
+        'HARD': {'base_pace': base_pace + 1.1, 'degradation': 0.03 * deg_spread + rng.uniform(0, 0.01)},
+    }
+
+def _best_of(fn, repeats, min_time=MIN_SAMPLE_TIME):
+    """
+    Seconds per call of `fn` and its result. Like timeit: the number of calls
+    per sample grows until a sample lasts at least `min_time`, and the fastest
+    of `repeats` samples is kept, so sub-millisecond engines are not measured
+    at timer resolution.
+    """
+    result = fn()
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed] + timer.repeat(repeats - 1, number) if repeats > 1 else [elapsed]
+    return min(samples) / number, result
+
+def _seeded_ga(tyre_models, total_laps, pit_loss, generations):
+    random.seed(config.RANDOM_SEED)
+    np.random.seed(config.RANDOM_SEED)
+    ga = GeneticOptimizer(tyre_models, total_laps, generations=generations, pit_loss=pit_loss)
+    best = ga.run()
+    return ga, best
+
+def _live_race(tyre_models, total_laps, pit_loss):
+    """ Re-plans every lap while following the plan; returns the latency stats. """
+    random.seed(config.RANDOM_SEED)
+    planner = LivePlanner(tyre_models, total_laps, pit_loss=pit_loss)
+    plan = planner.replan(RaceState(0))
+    compound, age, stops = plan['stints'][0][0], 0, 0
+    used = {compound}
+    for lap in range(1, total_laps):
+        age += 1
+        if plan['pit_laps'] and plan['pit_laps'][0] == lap:
+            compound, age, stops = plan['stints'][1][0], 0, stops + 1
+            used.add(compound)
+        plan = planner.replan(RaceState(lap, compound, age, stops, used))
+    return planner.latency_stats()
+
+def run_scenario(scenario, repeats=5, n_evals=20000, generations=config.GA_SETTINGS['GENERATIONS']):
+    """ Times every engine on one synthetic scenario and returns a flat metrics dict. """
+    tyre_models = synthetic_models(scenario['deg_spread'])
+    total_laps, pit_loss = scenario['total_laps'], scenario['pit_loss']
+    table = StintCostTable(tyre_models, total_laps, pit_loss)
+
+    random.seed(config.RANDOM_SEED)
+    population = [StrategyIndividual(table) for _ in range(n_evals)]
+
+    # 1. Fitness throughput (scalar and batched)
+    def scalar():
+        for ind in population:
+            ind.calculate_fitness()
+    scalar_s, _ = _best_of(scalar, repeats)
+    batch_s, _ = _best_of(lambda: evaluate_population(population, table), repeats)
+
+    # 2. Greedy and exact solvers
+    greedy_s, (greedy_time, _) = _best_of(GreedySolver(tyre_models, total_laps, pit_loss=pit_loss).solve, repeats)
+    exact_s, (exact_time, _) = _best_of(ExactSolver(tyre_models, total_laps, pit_loss=pit_loss).solve, repeats)
+
+    # 3. Genetic Algorithm: wall-clock, then peak memory on a separate run
+    ga_s, (ga, best) = _best_of(lambda: _seeded_ga(tyre_models, total_laps, pit_loss, generations), repeats)
+    tracemalloc.start()
+    _seeded_ga(tyre_models, total_laps, pit_loss, generations)
+    _, ga_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 4. Live re-planning latency over a whole race
+    live = _live_race(tyre_models, total_laps, pit_loss)
+
+    return {
+        'fitness_evals_per_s': n_evals / scalar_s,
+        'batch_evals_per_s': n_evals / batch_s,
+        'greedy_s': greedy_s,
+        'exact_s': exact_s,
+        'ga_s': ga_s,
+        'ga_peak_mem_kb': ga_peak / 1024,
+        'live_mean_ms': live['mean_ms'],
+        'live_p95_ms': live['p95_ms'],
+        'greedy_time': float(greedy_time),
+        'exact_time': float(exact_time),
+        'ga_time': float(best.fitness),
+        'ga_gap_s': float(best.fitness) - float(exact_time),
+        'ga_history': [float(h) for h in ga.best_history],
+    }
+
+def _keep_best(best, metrics):
+    """ Per-metric best of two runs of a scenario (solution quality is deterministic). """
+    if best is None:
+        return metrics
+    for key, value in metrics.items():
+        if key in HIGHER_IS_BETTER:
+            best[key] = max(best[key], value)
+        elif key.endswith(('_s', '_ms', '_kb')) and key != 'ga_gap_s':
+            best[key] = min(best[key], value)
+    return best
+
+def run_suite(repeats=5, n_evals=20000, generations=config.GA_SETTINGS['GENERATIONS'], rounds=3):
+    """
+    Runs every scenario `rounds` times, round-robin, and keeps the best value
+    of each metric: a slow spell of the machine hits one round of a scenario,
+    not all of its samples.
+    """
+    results = {}
+    for r in range(rounds):
+        for scenario in SCENARIOS:
+            print(f"Benchmarking {scenario['name']} ({scenario['total_laps']} laps), round {r + 1}/{rounds}...")
+            metrics = run_scenario(scenario, repeats, n_evals, generations)
+            results[scenario['name']] = _keep_best(results.get(scenario['name']), metrics)
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'settings': {'repeats': repeats, 'rounds': rounds, 'n_evals': n_evals, 'generations': generations},
+        'results': results,
+    }
+
+def format_metric(key, value):
+    """ Readable value of a metric: time in s / ms / us, throughput in k/s, memory in KB. """
+    if key in HIGHER_IS_BETTER:
+        return f"{value / 1000:.1f}k/s"
+    if key.endswith('_ms'):
+        return f"{value:.2f}ms"
+    if key.endswith('_kb'):
+        return f"{value:.0f}KB"
+    if key.endswith('_s') and key != 'ga_gap_s':
+        if value >= 1:
+            return f"{value:.2f}s"
+        return f"{value * 1000:.2f}ms" if value >= 1e-3 else f"{value * 1e6:.1f}us"
+    return f"{value:.3f}"
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Returns the list of regressions: a worse GA / solver solution, or a
+    throughput/time/memory metric worse than the baseline by more than
+    `tolerance` (relative) AND by more than its NOISE_FLOOR (absolute).
+    Throughputs are compared as the time of one batch of `n_evals`. """
+    regressions = []
+    n_evals = current['settings']['n_evals']
+    for name, metrics in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for key, value in metrics.items():
+            if key == 'ga_history' or key not in base:
+                continue
+            ref = base[key]
+            if key in ('greedy_time', 'exact_time', 'ga_time', 'ga_gap_s'):
+                # Solution quality: must not get worse at all
+                if value > ref + 1e-6:
+                    regressions.append(f"{name}.{key}: {value:.3f} vs baseline {ref:.3f}")
+                continue
+            if key in HIGHER_IS_BETTER:
+                worse = value < ref * (1 - tolerance)
+                excess, floor = n_evals / value - n_evals / ref, NOISE_FLOOR['s']
+            else:
+                worse = value > ref * (1 + tolerance)
+                excess, floor = value - ref, NOISE_FLOOR[key.rsplit('_', 1)[-1]]
+            if worse and excess > floor:
+                regressions.append(f"{name}.{key}: {format_metric(key, value)} "
+                                   f"vs baseline {format_metric(key, ref)}")
+    return regressions
+
+def print_report(report):
+    columns = [('evals/s', 'fitness_evals_per_s'), ('batch/s', 'batch_evals_per_s'), ('greedy', 'greedy_s'),
+               ('exact', 'exact_s'), ('GA', 'ga_s'), ('GA mem', 'ga_peak_mem_kb'), ('live P95', 'live_p95_ms')]
+    print(f"\n{'Scenario':<16}" + ''.join(f"{title:>11}" for title, _ in columns) + f"{'GA gap':>9}")
+    print("-" * (16 + 11 * len(columns) + 9))
+    for name, m in report['results'].items():
+        print(f"{name:<16}" + ''.join(f"{format_metric(key, m[key]):>11}" for _, key in columns)
+              + f"{m['ga_gap_s']:>8.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimizer benchmark on synthetic tyre models (no network).")
+    parser.add_argument('--repeats', type=int, default=5, help="Timing samples per metric (fastest is kept)")
+    parser.add_argument('--rounds', type=int, default=3, help="Passes over the scenarios (best value is kept)")
+    parser.add_argument('--evals', type=int, default=20000, help="Individuals for the fitness throughput test")
+    parser.add_argument('--generations', type=int, default=config.GA_SETTINGS['GENERATIONS'])
+    parser.add_argument('--save', metavar='PATH', help="Save results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    report = run_suite(args.repeats, args.evals, args.generations, args.rounds)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSIONS:")
+            for r in regressions:
+                print(f"  - {r}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,164 @@
 # --- DEFAULT PIT STOP LOSS ---
 DEFAULT_PIT_LOSS = 23.0
 
+# --- DATA CLEANING (part of the fitted-model cache key) ---
+DATA_CLEANING = {
+    'QUICKLAP_THRESHOLD': 1.07,    # Laps slower than 107% of the fastest are dropped
+    'OUTLIER_QUANTILE': 0.95,      # Per-compound lap time cut-off before the regression
+    'MIN_COMPOUND_LAPS': 10,       # Minimum clean laps to fit a compound
+    'MIN_DRIVER_LAPS': 5,          # Minimum clean laps for a per-driver fit
+    'PIT_LOSS_TRACK_STATUS': '1',  # Green-flag laps only for the pit loss
+    'WET_COMPOUNDS': False         # Also fit INTER / WET (wet-race models); dry compounds only by default
+}
+
+# --- MULTI-SESSION POOLED FIT ---
+POOLING = {
+    'ENABLED': False,
+    'PAST_YEARS': 2,                # Previous editions of the same GP
+    'PRACTICE_SESSIONS': ('FP2',),  # Long-run sessions of the same weekend
+    'MIN_STINT_LAPS': 5,            # Practice runs shorter than this (qualifying simulations) are dropped
+    'WORKERS': 4                    # Sessions loaded concurrently
+}
+
+# --- FASTF1 HTTP CACHE (enabled on the first download) ---
+FASTF1_CACHE_DIR = 'cache'
+
+# --- SESSION PREFETCH (prefetch.py) ---
+PREFETCH = {
+    'WORKERS': 4,                  # Sessions downloaded at once
+    'RETRIES': 3,                  # Extra attempts after a failed download
+    'BACKOFF': 2.0,                # First retry delay (s), doubled at every retry...
+    'MAX_BACKOFF': 30.0,           # ...up to this
+    'SESSIONS': ('R',)             # Session types prefetched per event
+}
+
+# --- FITTED MODEL CACHE ---
+MODEL_CACHE = {
+    'ENABLED': True,
+    'DIR': 'model_cache',
+    'MAX_BYTES': 500 * 1024 * 1024
+}
+
 # --- 1. STRUCTURAL LIMITS (Max tire life) ---
 MAX_LIFE = {
     'SOFT': 18,    
     'MEDIUM': 28,
-    'HARD': 45     
+    'HARD': 45,
+    'INTER': 30,
+    'WET': 35
 }
 
 # --- 2. NON-LINEAR PHYSICAL WEAR (The "Cliff") ---
 NON_LINEAR_WEAR = {
     'SOFT': 0.005,    
     'MEDIUM': 0.002,  
-    'HARD': 0.001     
+    'HARD': 0.001,
+    'INTER': 0.003,
+    'WET': 0.002
 }
 
 # --- 3. TERMIC WARM-UP ---
 WARMUP_PENALTY = {
     'SOFT': 0.5,   
     'MEDIUM': 1.5, 
-    'HARD': 4.5    
+    'HARD': 4.5,
+    'INTER': 1.0,
+    'WET': 1.0
+}
+
+# --- 4. RACE PENALTIES (seconds) ---
+RACE_PENALTIES = {
+    'TRAFFIC_LAPS': 3,         # Laps in dirty air after a stop
+    'TRAFFIC': 1.5,            # Time lost per traffic lap
+    'SHORT_STINT_LAPS': 10,    # Later stints shorter than this are penalised...
+    'SHORT_STINT': 4.0,        # ...by this much per missing lap
+    'OVER_LIMIT': 20.0,        # Per lap beyond MAX_LIFE
+    'TWO_COMPOUND': 1000.0     # Fewer than 2 compounds used (DSQ)
 }
 
 # --- GENETIC ALGORITHMN CONFIGURATION ---
 GA_SETTINGS = {
     'POP_SIZE': 80,
     'GENERATIONS': 60,
-    'MUTATION_RATE': 0.25
+    'MUTATION_RATE': 0.25,
+    'FITNESS_BACKEND': 'numpy',  # 'numpy' (batched) or 'python' (one individual at a time)
+    # Stopping criteria (None = disabled). GENERATIONS is the upper bound.
+    'STALL_GENERATIONS': None,   # Stop after N generations without enough improvement
+    'MIN_REL_IMPROVEMENT': 0.0,  # Relative improvement over the stall window that counts
+    'TIME_BUDGET': None,         # Wall-clock seconds
+    'TARGET_FITNESS': None,      # Stop once the best race time is <= this value
+    'FITNESS_CACHE_SIZE': 100000,# Genomes memoized per run (0 = no cache)
+    'OPERATORS': 'structural',   # 'structural' (cut-point crossover, add/remove stops) or 'classic'
+    'MAX_STOPS': 3               # Upper bound on stops for the structural operators
+}
+
+# --- ISLAND MODEL (PARALLEL GA) ---
+ISLAND_SETTINGS = {
+    'ENABLED': False,
+    'ISLANDS': 4,              # Sub-populations, each of POP_SIZE individuals
+    'MIGRATION_INTERVAL': 10,  # Generations between migrations
+    'MIGRANTS': 2,             # Elites sent to the next island
+    'WORKERS': None            # Processes (None = min(ISLANDS, CPU cores))
+}
+
+# --- MONTE CARLO ROBUSTNESS ---
+ROBUSTNESS = {
+    'OBJECTIVE': 'point',     # GA objective: 'point' (deterministic), 'mean' or 'cvar'
+    'SCENARIOS': 2000,        # Sampled races per evaluation
+    'CVAR_ALPHA': 0.9,        # CVaR = mean of the worst (1 - alpha) share of outcomes
+    'SC_RATE': 0.6,           # Expected safety-car periods per race (Poisson)
+    'SC_LAPS': (3, 6),        # Min/max length of a safety-car period
+    'SC_PIT_FACTOR': 0.5,     # Pit loss multiplier for stops under safety car
+    'PIT_LOSS_STD': 1.5,      # Pit loss standard deviation (s)
+    'DEG_REL_STD': 0.15,      # Degradation noise when the fit has no standard error
+    'BASE_PACE_STD': 0.0      # Base pace noise when the fit has no standard error
+}
+
+# --- TEAM STRATEGY (team.py) ---
+TEAM_SETTINGS = {
+    'POP_SIZE': 120,
+    'GENERATIONS': 80,
+    'MUTATION_RATE': 0.3,
+    'RUNS': 4,                   # Independent joint GA runs (best one is kept)
+    'WORKERS': None,             # Processes for the runs (None = CPU cores, 1 = in-process)
+    'STALL_GENERATIONS': 25,     # Stop a run after N generations without improvement
+    'TIME_BUDGET': None,         # Wall-clock seconds per run
+    'OPERATORS': 'classic',      # Runs start from each car's optimum: fine pit-lap moves matter most
+    'SAME_LAP_PENALTY': 5.0,     # Both cars stop on the same lap (double stack)
+    'ADJACENT_LAP_PENALTY': 1.5, # Stops one lap apart (pit lane traffic)
+    'UNDERCUT_WINDOW': 4,        # Stops 2..N laps apart count as an undercut offset...
+    'UNDERCUT_GAIN': 1.0         # ...and are credited this much
+}
+
+# --- LIVE RE-PLANNING (live.py) ---
+LIVE_SETTINGS = {
+    'POP_SIZE': 60,
+    'GENERATIONS': 25,         # Per re-plan, warm-started from the previous lap
+    'TIME_BUDGET': 0.08,       # Seconds per re-plan (target latency ~100 ms)
+    'FRESH_SHARE': 0.2,        # Share of random newcomers added at every re-plan
+    'PIT_WINDOW': 3            # Laps ahead in which a RaceState pit_loss override (safety car) applies
+}
+
+# --- STRATEGY INDEX (strategy_index.py) ---
+STRATEGY_INDEX = {
+    'DIR': 'strategy_index',   # On-disk indexes, one per race / physics
+    'TOP_K': 100,              # Strategies kept per (stop count, starting compound)
+    'MAX_STOPS': 3,
+    'CHUNK_SIZE': 2000000      # Strategies scored per NumPy pass (bounds memory)
+}
+
+# --- SENSITIVITY SWEEP (sensitivity.py) ---
+SENSITIVITY = {
+    'MAX_STOPS': 3,            # ExactSolver bound at every grid point
+    'WORKERS': None            # Processes (None = CPU cores, 1 = in-process)
+}
+
+# --- RUN INSTRUMENTATION (instrumentation.py) ---
+INSTRUMENTATION = {
+    'MODE': 'off',                   # 'off', 'events', 'profile' (cProfile) or 'memory' (tracemalloc)
+    'EVENTS_FILE': 'run_events.jsonl',
+    'PROFILE_FILE': 'run.prof',      # pstats file written in 'profile' mode
+    'MEMORY_TOP': 15                 # Allocation sites reported in 'memory' mode
 }
 
 RANDOM_SEED = 42
@@ -1,61 +1,243 @@
 import os
-import fastf1
-import fastf1.plotting
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 import config
+from instrumentation import recorder
 
-if not os.path.exists('cache'):
-    os.makedirs('cache')
-fastf1.Cache.enable_cache('cache')
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD']
+WET_COMPOUNDS = ['INTER', 'WET']        # Opt-in (DATA_CLEANING['WET_COMPOUNDS']), when the session ran them
+DEFAULT_MODEL = {'base_pace': 100.0, 'degradation': 0.1}
+
+_fastf1 = None
+_fastf1_lock = threading.Lock()
+
+def fastf1_module():
+    """
+    Imports FastF1 on first use and enables its HTTP cache there, so importing
+    this module has no side effects and pure optimizer runs never load it.
+    """
+    global _fastf1
+    with _fastf1_lock:
+        if _fastf1 is None:
+            import fastf1
+            os.makedirs(config.FASTF1_CACHE_DIR, exist_ok=True)
+            fastf1.Cache.enable_cache(config.FASTF1_CACHE_DIR)
+            _fastf1 = fastf1
+    return _fastf1
+
+def fit_grouped(x, y, groups, n_groups, within=None, n_within=1):
+    """
+    CLOSED-FORM GROUPED REGRESSION
+    Least squares y = base_pace + degradation * x for every group at once,
+    from per-group sums (np.bincount) instead of one estimator per group.
+    Returns intercept, slope, their standard errors, the intercept/slope
+    covariance and the group sizes; groups with fewer than 2 distinct x values
+    get NaN.
+    With `within` (codes 0..n_within-1, e.g. sessions) every (group, within)
+    cell gets its own intercept and the group keeps one slope, fitted on the
+    values demeaned within each cell; intercept, its standard error, the
+    covariance and the sizes are then (n_groups, n_within) arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    groups = np.asarray(groups, dtype=np.int64)
+    cells = groups * n_within + (0 if within is None else np.asarray(within, dtype=np.int64))
+    n_cells = n_groups * n_within
+    n = np.bincount(groups, minlength=n_groups).astype(float)
+    n_cell = np.bincount(cells, minlength=n_cells).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = np.bincount(cells, x, n_cells) / n_cell
+        mean_y = np.bincount(cells, y, n_cells) / n_cell
+        dx = x - mean_x[cells]
+        dy = y - mean_y[cells]
+        sxx = np.bincount(groups, dx * dx, n_groups)
+        sxy = np.bincount(groups, dx * dy, n_groups)
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        intercept = mean_y - np.repeat(slope, n_within) * mean_x
+
+        # Standard errors (used by the Monte Carlo robustness engine):
+        # one intercept per non-empty cell plus the shared slope
+        resid = dy - slope[groups] * dx
+        n_params = (n_cell.reshape(n_groups, n_within) > 0).sum(axis=1) + 1
+        s2 = np.bincount(groups, resid * resid, n_groups) / np.maximum(n - n_params, 1)
+        slope_se = np.sqrt(s2 / sxx)
+        intercept_se = np.sqrt(np.repeat(s2, n_within) * (1 / n_cell + mean_x ** 2 / np.repeat(sxx, n_within)))
+        # The intercept is mean_y - slope * mean_x: strongly anti-correlated with the slope when mean_x > 0
+        cov = -mean_x * np.repeat(s2 / sxx, n_within)
+    if within is None:
+        return intercept, slope, intercept_se, slope_se, cov, n
+    shape = (n_groups, n_within)
+    return (intercept.reshape(shape), slope, intercept_se.reshape(shape), slope_se, cov.reshape(shape),
+            n_cell.reshape(shape))
+
+def long_run_laps(laps, min_laps):
+    """
+    Laps of the runs of at least `min_laps` consecutive clean laps on one
+    compound: practice long runs, without the short qualifying simulations.
+    """
+    laps = laps.sort_values(['Driver', 'LapNumber'])
+    driver = laps['Driver'].astype(str)
+    compound = laps['Compound'].astype(str)
+    new_run = (driver != driver.shift()) | (compound != compound.shift()) | (laps['LapNumber'].diff() != 1)
+    run = new_run.cumsum()
+    return laps[run.groupby(run).transform('size') >= min_laps]
+
+def fit_degradation_models(laps, cleaning=config.DATA_CLEANING, target=None):
+    """
+    Fits the per-compound models and the per-(compound, driver) models of a
+    clean lap table in one grouped pass each.
+    Returns (models, driver_models) with driver_models[compound][driver].
+    INTER / WET are fitted only with cleaning['WET_COMPOUNDS'] set.
+    A pooled table (with a 'Session' column) gets one intercept per session
+    and a shared degradation slope; the models keep the intercept of the
+    `target` session, or of the session with most laps when the target did
+    not run that compound / driver.
+    """
+    known = COMPOUNDS + (WET_COMPOUNDS if cleaning.get('WET_COMPOUNDS') else [])
+    laps = laps[laps['Compound'].isin(known) & laps['TyreLife'].notna() & laps['LapTimeSec'].notna()]
+    compound = laps['Compound'].astype(str)
+    counts = compound.value_counts()
+    fitted = [c for c in known if counts.get(c, 0) >= cleaning['MIN_COMPOUND_LAPS']]
+
+    # Per-compound outlier cut-off, then drop the compounds with too few laps
+    q_high = laps.groupby(compound)['LapTimeSec'].transform(lambda t: t.quantile(cleaning['OUTLIER_QUANTILE']))
+    keep = (laps['LapTimeSec'] < q_high) & compound.isin(fitted)
+    laps, compound = laps[keep], compound[keep]
+
+    # Session fixed effects: years, cars and fuel loads differ in level, not in slope
+    within, n_within = None, 1
+    if 'Session' in laps.columns:
+        sessions = sorted(laps['Session'].astype(str).unique())
+        within = laps['Session'].astype(str).map({s: k for k, s in enumerate(sessions)}).to_numpy(dtype=np.int64)
+        n_within = len(sessions)
+        target = sessions.index(target) if target in sessions else None
+
+    def as_model(i, base, deg, base_se, deg_se, cov, n):
+        if within is not None:
+            j = target if target is not None and n[i, target] > 0 else int(np.argmax(n[i]))
+            base, base_se, cov = base[:, j], base_se[:, j], cov[:, j]
+        return {'base_pace': base[i], 'degradation': deg[i], 'base_pace_se': base_se[i], 'degradation_se': deg_se[i],
+                'base_deg_cov': cov[i]}
+
+    def total(n):
+        return n if within is None else n.sum(axis=1)
+
+    comp_codes = compound.map({c: k for k, c in enumerate(fitted)}).to_numpy(dtype=np.int64)
+    fit = fit_grouped(laps['TyreLife'], laps['LapTimeSec'], comp_codes, len(fitted), within, n_within)
+    models = {c: as_model(k, *fit) for k, c in enumerate(fitted) if np.isfinite(fit[1][k])}
+
+    drivers = sorted(laps['Driver'].astype(str).unique())
+    driver_codes = laps['Driver'].astype(str).map({d: k for k, d in enumerate(drivers)}).to_numpy(dtype=np.int64)
+    groups = comp_codes * len(drivers) + driver_codes
+    fit = fit_grouped(laps['TyreLife'], laps['LapTimeSec'], groups, len(fitted) * len(drivers), within, n_within)
+    driver_models = {}
+    for g in np.flatnonzero((total(fit[5]) >= cleaning['MIN_DRIVER_LAPS']) & np.isfinite(fit[1])):
+        comp, driver = fitted[g // len(drivers)], drivers[g % len(drivers)]
+        driver_models.setdefault(comp, {})[driver] = as_model(g, *fit)
+    return models, driver_models
+
+def simulation_models(models, driver_models=None, driver=None):
+    """
+    Models handed to the optimizers: driver fit when available, defaults for
+    missing dry compounds; INTER / WET only when they were fitted.
+    """
+    result = {}
+    for comp in COMPOUNDS + [c for c in WET_COMPOUNDS if c in models]:
+        if driver is not None and driver in (driver_models or {}).get(comp, {}):
+            result[comp] = driver_models[comp][driver]
+        elif comp in models:
+            result[comp] = models[comp]
+        else:
+            result[comp] = DEFAULT_MODEL.copy()
+    return result
 
 class TyreDataModeler:
-    def __init__(self, year, gp, session_type='R'):
+    def __init__(self, year, gp, session_type='R', cache=None, cleaning=config.DATA_CLEANING, provider=None):
         self.year = year
         self.gp = gp
         self.session_type = session_type
         self.laps = None
         self.models = {} 
+        self.driver_models = {}
         self.pit_loss = config.DEFAULT_PIT_LOSS
+        self.total_laps = None
+        self.cache = cache          # Optional model_cache.ModelCache
+        self.cleaning = dict(cleaning)
+        self.from_cache = False
+        self.provider = provider    # Session source with get_session() (default: FastF1)
         
-    def load_and_clean_data(self):
+    def load_and_clean_data(self, refresh=False):
+        """
+        Loads the session and keeps only clean laps. With a cache attached, a
+        previous fit of the same session and cleaning parameters is reused
+        (refresh=True forces a new download and overwrites the entry).
+        """
+        if self.cache is not None and not refresh and self._load_from_cache():
+            print(f"Loaded {self.gp} {self.year} from model cache ({len(self.laps)} clean laps).")
+            recorder.event('model_cache_hit', year=self.year, gp=self.gp, session=self.session_type)
+            return
+
+        self.from_cache = False
         print(f"Loading {self.gp} {self.year}...")
-        session = fastf1.get_session(self.year, self.gp, self.session_type)
-        session.load()
+        with recorder.phase('load', year=self.year, gp=self.gp, session=self.session_type):
+            session = (self.provider or fastf1_module()).get_session(self.year, self.gp, self.session_type)
+            # Laps only: no car telemetry, position data, weather or race control messages
+            session.load(laps=True, telemetry=False, weather=False, messages=False)
         
+        # Single pass over the timing table: every filter is a boolean mask
+        raw = session.laps
+        frame = pd.DataFrame({
+            'Driver': raw['Driver'].astype('category'),
+            'LapNumber': raw['LapNumber'],
+            'LapTimeSec': raw['LapTime'].dt.total_seconds(),
+            'Compound': raw['Compound'].astype('category'),
+            'TyreLife': raw['TyreLife'],
+            'InLap': raw['PitInTime'].notna(),
+            'OutLap': raw['PitOutTime'].notna(),
+            'Green': raw['TrackStatus'] == self.cleaning['PIT_LOSS_TRACK_STATUS'],
+        })
+        del raw, session
+
         # Calculate the pit loss
-        self.pit_loss = self._calculate_pit_loss(session)
+        with recorder.phase('pit_loss', gp=self.gp):
+            self.pit_loss = self._calculate_pit_loss(frame)
         print(f"--> Pit Loss Calcolata (Mediana): {self.pit_loss:.2f}s")
         
-        laps = session.laps.pick_quicklaps()
-        laps = laps.loc[(laps['PitOutTime'].isnull()) & (laps['PitInTime'].isnull())]
-        
-        laps['LapTimeSec'] = laps['LapTime'].dt.total_seconds()
-        self.laps = laps[['Driver', 'LapNumber', 'LapTimeSec', 'Compound', 'TyreLife']]
+        # Quick laps (same rule as Laps.pick_quicklaps) without pit in/out laps
+        threshold = frame['LapTimeSec'].min() * self.cleaning['QUICKLAP_THRESHOLD']
+        clean = (frame['LapTimeSec'] < threshold) & ~frame['InLap'] & ~frame['OutLap'] & frame['LapNumber'].notna()
+        laps = frame.loc[clean, ['Driver', 'LapNumber', 'LapTimeSec', 'Compound', 'TyreLife']]
+
+        # Compact dtypes: int16 lap numbers, float32 times and tyre ages
+        self.laps = laps.astype({
+            'LapNumber': 'int16',
+            'LapTimeSec': 'float32',
+            'TyreLife': 'float32',
+        }).reset_index(drop=True)
         print(f"Data Loaded. {len(self.laps)} clean laps found.")
 
-    def _calculate_pit_loss(self, session):
+    def _calculate_pit_loss(self, frame):
         """
         Calculate the time loss using the median method to ignore slow pit stops or incidents.
         Formula: Loss = (Median InLap + Median OutLap) - (2 * Median CleanLap)
+        `frame` is the compact lap table built by load_and_clean_data.
         """
-        laps = session.laps.pick_track_status('1')
-        laps['LapTimeSec'] = laps['LapTime'].dt.total_seconds()
+        laps = frame[frame['Green']]
         
         # 1. Clean Laps (Median Race Lap)
-        clean_laps = laps[laps['PitOutTime'].isnull() & laps['PitInTime'].isnull()]
+        clean_laps = laps[~laps['OutLap'] & ~laps['InLap']]
         if clean_laps.empty: return config.DEFAULT_PIT_LOSS
         avg_race = clean_laps['LapTimeSec'].median()
         
         # 2. In-Laps (Median)
-        in_laps = laps[~laps['PitInTime'].isnull()]
+        in_laps = laps[laps['InLap']]
         if in_laps.empty: return config.DEFAULT_PIT_LOSS
         avg_in = in_laps['LapTimeSec'].median()
         
         # 3. Out-Laps (Median)
-        out_laps = laps[~laps['PitOutTime'].isnull()]
+        out_laps = laps[laps['OutLap']]
         out_laps = out_laps[out_laps['LapNumber'] > 1] 
         if out_laps.empty: return config.DEFAULT_PIT_LOSS
         avg_out = out_laps['LapTimeSec'].median()
@@ -64,27 +246,118 @@ class TyreDataModeler:
         return max(15.0, loss)
 
     def analyze_degradation(self):
-        compounds = ['SOFT', 'MEDIUM', 'HARD']
-        for compound in compounds:
-            comp_laps = self.laps[self.laps['Compound'] == compound]
-            if len(comp_laps) < 10: continue
-
-            q_high = comp_laps['LapTimeSec'].quantile(0.95)
-            comp_laps = comp_laps[comp_laps['LapTimeSec'] < q_high]
-
-            X = comp_laps[['TyreLife']].values 
-            y = comp_laps['LapTimeSec'].values 
-            
-            reg = LinearRegression().fit(X, y)
-            self.models[compound] = {
-                'base_pace': reg.intercept_,
-                'degradation': reg.coef_[0]
-            }
-
-    def get_simulation_data(self):
+        if self.from_cache:
+            return
+        with recorder.phase('fit', gp=self.gp, laps=len(self.laps)):
+            self.models, self.driver_models = fit_degradation_models(self.laps, self.cleaning)
+
+    def get_simulation_data(self, driver=None):
+        """ Returns (tyre_models, total_laps, pit_loss); `driver` selects that driver's fits. """
+        if self.laps is None and self.cache is not None:
+            self._load_from_cache()
+        if driver is not None and not self.driver_models:
+            _, self.driver_models = fit_degradation_models(self.laps, self.cleaning)
+        if self.from_cache:
+            return simulation_models(self.models, self.driver_models, driver), self.total_laps, self.pit_loss
+
         total_laps = int(self.laps['LapNumber'].max())
-        defaults = {'base_pace': 100.0, 'degradation': 0.1}
-        for comp in ['SOFT', 'MEDIUM', 'HARD']:
-            if comp not in self.models:
-                self.models[comp] = defaults.copy()
-        return self.models, total_laps, self.pit_loss
\ No newline at end of file
+        self.models = simulation_models(self.models)
+        self.total_laps = total_laps
+
+        if self.cache is not None:
+            self.cache.put(self.year, self.gp, self.session_type, self.cleaning,
+                           self.laps, self.models, self.pit_loss, total_laps)
+        return simulation_models(self.models, self.driver_models, driver), total_laps, self.pit_loss
+
+    def _load_from_cache(self):
+        entry = self.cache.get(self.year, self.gp, self.session_type, self.cleaning)
+        if entry is None:
+            return False
+        self.laps = entry['laps']
+        self.models = entry['models']
+        self.pit_loss = entry['pit_loss']
+        self.total_laps = entry['total_laps']
+        self.from_cache = True
+        return True
+
+class MultiSessionModeler:
+    """
+    POOLED DEGRADATION FIT
+    Pools several sessions (e.g. FP2 long runs plus the last N years of the
+    same GP) into per-compound and per-driver models. Sessions are loaded
+    concurrently; the first one is the target race and provides total_laps
+    and pit_loss. Only runs of at least `min_stint_laps` laps are kept from
+    non-race sessions, and every session gets its own intercept around a
+    shared degradation slope (fit_degradation_models). Exposes the same
+    interface as TyreDataModeler.
+    """
+    def __init__(self, sessions, cache=None, max_workers=config.POOLING['WORKERS'], cleaning=config.DATA_CLEANING,
+                 provider=None, min_stint_laps=config.POOLING['MIN_STINT_LAPS']):
+        self.sessions = list(sessions)      # [(year, gp, session_type), ...], target race first
+        self.cache = cache
+        self.provider = provider
+        self.max_workers = max_workers
+        self.cleaning = dict(cleaning)
+        self.min_stint_laps = min_stint_laps
+        self.laps = None
+        self.models = {}
+        self.driver_models = {}
+        self.pit_loss = config.DEFAULT_PIT_LOSS
+        self.total_laps = None
+
+    @classmethod
+    def for_event(cls, year, gp, past_years=config.POOLING['PAST_YEARS'],
+                  practice=config.POOLING['PRACTICE_SESSIONS'], **kwargs):
+        sessions = [(year, gp, 'R')]
+        sessions += [(year, gp, p) for p in practice]
+        sessions += [(year - k, gp, 'R') for k in range(1, past_years + 1)]
+        return cls(sessions, **kwargs)
+
+    def _load(self, session, refresh=False):
+        year, gp, session_type = session
+        modeler = TyreDataModeler(year, gp, session_type, cache=self.cache, cleaning=self.cleaning,
+                                  provider=self.provider)
+        modeler.load_and_clean_data(refresh=refresh)
+        if not modeler.from_cache:
+            # Fit and store the single-session entry so the next run is offline
+            modeler.analyze_degradation()
+            modeler.get_simulation_data()
+        return modeler
+
+    def load_and_clean_data(self, refresh=False):
+        """ Loads every session (refresh=True downloads them again, bypassing the model cache). """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._load, s, refresh) for s in self.sessions]
+
+        frames = []
+        for session, future in zip(self.sessions, futures):
+            try:
+                modeler = future.result()
+            except Exception as e:
+                if session == self.sessions[0]:
+                    raise
+                print(f"Skipping {session[1]} {session[0]} {session[2]}: {e}")
+                continue
+            if session == self.sessions[0]:
+                self.pit_loss = modeler.pit_loss
+                self.total_laps = modeler.total_laps
+            laps = modeler.laps
+            if session[2] != 'R':
+                laps = long_run_laps(laps, self.min_stint_laps)
+            frames.append(laps.assign(Session=self._label(session)))
+
+        laps = pd.concat(frames, ignore_index=True)
+        self.laps = laps.astype({'Driver': 'category', 'Compound': 'category', 'Session': 'category'})
+        print(f"Pooled {len(frames)} sessions: {len(self.laps)} clean laps.")
+
+    def analyze_degradation(self):
+        with recorder.phase('fit', sessions=len(self.sessions), laps=len(self.laps)):
+            self.models, self.driver_models = fit_degradation_models(self.laps, self.cleaning,
+                                                                     target=self._label(self.sessions[0]))
+
+    @staticmethod
+    def _label(session):
+        return f"{session[0]} {session[2]}"
+
+    def get_simulation_data(self, driver=None):
+        return simulation_models(self.models, self.driver_models, driver), self.total_laps, self.pit_loss
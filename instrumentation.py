@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import config
+
+MODES = ('off', 'events', 'profile', 'memory')
+
+class Recorder:
+    """
+    RUN INSTRUMENTATION
+    Structured events (one JSON object per line) for the phases of a run:
+    phase timers, counters (e.g. fitness evaluations) and per-generation GA
+    statistics. Modes:
+    - 'off': nothing is recorded; hot paths only test `enabled`;
+    - 'events': JSON-lines events;
+    - 'profile': events + a cProfile capture of the whole run (pstats file);
+    - 'memory': events + tracemalloc (peak memory per phase, top allocations).
+    A single shared instance (`recorder`) is configured once per run.
+    """
+    def __init__(self):
+        self.mode = 'off'
+        self.enabled = False
+        self._file = None
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._started = 0.0
+        self.counters = {}
+        self.profile_path = None
+
+    def configure(self, mode=config.INSTRUMENTATION['MODE'], path=config.INSTRUMENTATION['EVENTS_FILE'],
+                  profile_path=config.INSTRUMENTATION['PROFILE_FILE']):
+        """ Starts recording in `mode` (see MODES); call stop() at the end of the run. """
+        if mode not in MODES:
+            raise ValueError(f"Unknown instrumentation mode '{mode}' (choose from {MODES})")
+        self.stop()
+        self.mode = mode
+        self.enabled = mode != 'off'
+        if not self.enabled:
+            return
+        self.counters = {}
+        self._started = time.perf_counter()
+        self._file = open(path, 'w')
+        if mode == 'profile':
+            import cProfile
+            self.profile_path = profile_path
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif mode == 'memory':
+            import tracemalloc
+            tracemalloc.start()
+        self.event('start', mode=mode, pid=os.getpid())
+
+    def event(self, kind, **fields):
+        if not self.enabled:
+            return
+        record = {'event': kind, 't': round(time.perf_counter() - self._started, 6)}
+        record.update(fields)
+        line = json.dumps(record, default=float)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def phase(self, name, **fields):
+        """ Context manager timing a phase ('phase' event on exit). """
+        if not self.enabled:
+            return nullcontext()
+        return self._phase(name, fields)
+
+    @contextmanager
+    def _phase(self, name, fields):
+        if self.mode == 'memory':
+            import tracemalloc
+            if hasattr(tracemalloc, 'reset_peak'):      # Python 3.9+
+                tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = dict(fields, name=name, seconds=time.perf_counter() - started)
+            if self.mode == 'memory':
+                import tracemalloc
+                current, peak = tracemalloc.get_traced_memory()
+                record.update(mem_kb=current / 1024, mem_peak_kb=peak / 1024)
+            self.event('phase', **record)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        """ Flushes counters and the profile / memory captures, then disables recording. """
+        if not self.enabled:
+            return
+        self.event('counters', **self.counters)
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            self.event('profile', path=self.profile_path)
+            self._profiler = None
+        if self.mode == 'memory':
+            import tracemalloc
+            top = tracemalloc.take_snapshot().statistics('lineno')[:config.INSTRUMENTATION['MEMORY_TOP']]
+            self.event('memory_top', allocations=[{'where': str(s.traceback), 'kb': s.size / 1024} for s in top])
+            tracemalloc.stop()
+        self.event('stop', seconds=time.perf_counter() - self._started)
+        self._file.close()
+        self._file = None
+        self.enabled = False
+        self.mode = 'off'
+
+recorder = Recorder()
@@ -0,0 +1,232 @@
+import time
+from array import array
+import numpy as np
+import config
+from optimizers import (StintCostTable, StrategyIndividual, GeneticOptimizer, GreedySolver, evaluate_population,
+                        population_to_arrays)
+
+class RaceState:
+    """
+    PIT WALL SNAPSHOT
+    State of the car at the end of a lap: laps completed, compound fitted and
+    its age, stops made and compounds already run. `compound=None` (lap 0 only)
+    leaves the starting tyre free. `pit_loss` overrides the planner's value for
+    stops made within the next `pit_window` laps, e.g. a cheaper stop under
+    safety car; later stops keep the nominal pit loss.
+    """
+    def __init__(self, lap, compound=None, tyre_age=0, stops=0, compounds_used=(), pit_loss=None,
+                 pit_window=config.LIVE_SETTINGS['PIT_WINDOW']):
+        self.lap = lap
+        self.compound = compound
+        self.tyre_age = tyre_age
+        self.stops = stops
+        self.compounds_used = set(compounds_used)
+        if compound is not None:
+            self.compounds_used.add(compound)
+        self.pit_loss = pit_loss
+        self.pit_window = pit_window
+
+class SuffixCostTable:
+    """
+    REMAINING-RACE COST TABLE
+    Same interface as StintCostTable, over the laps still to run. The "first"
+    stint is the rest of the current stint: its cost is the difference of the
+    race-wide stint costs at tyre_age + n and tyre_age, so penalties already
+    paid (warm-up, traffic) are not charged again. Other compounds are inf on
+    the first stint, as the car cannot change tyres without stopping.
+    `pit_loss` is the nominal stop cost; pit_loss_by_lap[n] is the cost of a
+    stop after n more laps (the RaceState override inside its window).
+    """
+    def __init__(self, race_table, state, remaining, pit_loss):
+        self.compounds = race_table.compounds
+        self.index = race_table.index
+        self.total_laps = remaining
+        self.pit_loss = pit_loss
+        self.compound_penalty = race_table.compound_penalty
+        self.pit_loss_by_lap = np.full(remaining + 1, float(pit_loss))
+        if state.pit_loss is not None:
+            self.pit_loss_by_lap[1:state.pit_window + 1] = state.pit_loss
+
+        first = np.full((len(self.compounds), remaining + 1), np.inf)
+        if state.compound is None:
+            first[:, 1:] = race_table.first_array[:, 1:remaining + 1]
+        else:
+            k = self.index[state.compound]
+            row = (race_table.later_array if state.stops else race_table.first_array)[k]
+            age = state.tyre_age
+            sunk = row[age] if age > 0 else 0.0
+            first[k, 1:] = row[age + 1:age + remaining + 1] - sunk
+        later = np.array(race_table.later_array[:, :remaining + 1])
+        first.setflags(write=False)
+        later.setflags(write=False)
+        self.first_array = first
+        self.later_array = later
+        self.first = tuple(tuple(r) for r in first.tolist())
+        self.later = tuple(tuple(r) for r in later.tolist())
+
+class SuffixEvaluator:
+    """
+    GA objective on the remaining stints (no two-compound penalty once the rule
+    is met). Stops are charged at the nominal pit loss, then corrected by
+    pit_loss_by_lap at the lap each stop is made.
+    """
+    def __init__(self, cost_table, rule_met):
+        self.cost_table = cost_table
+        self.compound_penalty = 0.0 if rule_met else cost_table.compound_penalty
+        self.pit_delta = cost_table.pit_loss_by_lap - cost_table.pit_loss
+
+    def score(self, population):
+        times = evaluate_population(population, self.cost_table, compound_penalty=self.compound_penalty)
+        if not self.pit_delta.any() or not population:
+            return times
+        _, laps, n_stints = population_to_arrays(population)
+        stop_laps = np.cumsum(laps.astype(np.int64), axis=1)[:, :-1]
+        is_stop = np.arange(stop_laps.shape[1]) < (n_stints - 1)[:, None]
+        stop_laps = np.minimum(stop_laps, len(self.pit_delta) - 1)
+        return times + np.where(is_stop, self.pit_delta[stop_laps], 0.0).sum(axis=1)
+
+class SuffixGeneticOptimizer(GeneticOptimizer):
+    """ GeneticOptimizer whose genomes always start on the compound currently fitted. """
+    def __init__(self, *args, pinned=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pinned = pinned
+
+    def _crossover(self, p1, p2):
+        child = super()._crossover(p1, p2)
+        if self.pinned is not None:
+            child.comps[0] = self.pinned
+        return child
+
+    def _mutate(self, ind):
+        super()._mutate(ind)
+        if self.pinned is not None:
+            ind.comps[0] = self.pinned
+
+def shift_genome(comps, laps, driven):
+    """ Drops the first `driven` laps of a plan, removing the stints they complete. """
+    comps, laps = array('b', comps), array('h', laps)
+    while driven > 0 and laps:
+        step = min(driven, laps[0])
+        laps[0] -= step
+        driven -= step
+        if laps[0] == 0:
+            del comps[0]
+            del laps[0]
+    return comps, laps
+
+class LivePlanner:
+    """
+    IN-RACE RE-OPTIMIZATION
+    Re-plans the rest of the race from the current RaceState, lap after lap.
+    Each call only scores the remaining-stint suffix and warm-starts the GA
+    from the previous call's population shifted by the laps driven since,
+    plus a share of random newcomers, under a per-call time budget.
+    Latency of every call is recorded in `latencies` (seconds).
+    """
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS,
+                 pop_size=config.LIVE_SETTINGS['POP_SIZE'],
+                 generations=config.LIVE_SETTINGS['GENERATIONS'],
+                 time_budget=config.LIVE_SETTINGS['TIME_BUDGET'],
+                 fresh_share=config.LIVE_SETTINGS['FRESH_SHARE'],
+                 mutation_rate=config.GA_SETTINGS['MUTATION_RATE']):
+        self.tyre_models = tyre_models
+        self.total_laps = total_laps
+        self.pit_loss = pit_loss
+        self.pop_size = pop_size
+        self.generations = generations
+        self.time_budget = time_budget
+        self.fresh_share = fresh_share
+        self.mutation_rate = mutation_rate
+        # Race-wide stint costs, widened on demand for tyres older than the race
+        self.race_table = StintCostTable(tyre_models, total_laps, pit_loss)
+        self.greedy_plan = None
+        self.previous = None        # (lap, [(comps, laps), ...]) of the last call
+        self.latencies = []
+
+    def replan(self, state):
+        """
+        Returns the best plan for the remaining laps: stints (the first one is
+        the current tyre), absolute pit laps, predicted remaining time and the
+        call latency.
+        """
+        started = time.perf_counter()
+        remaining = self.total_laps - state.lap
+        if remaining <= 0:
+            raise ValueError(f"Race is over: lap {state.lap} of {self.total_laps}")
+        if state.compound is None and (state.lap or state.stops):
+            raise ValueError("The fitted compound is required once the race has started")
+
+        if state.tyre_age + remaining > self.race_table.total_laps:
+            self.race_table = StintCostTable(self.tyre_models, state.tyre_age + remaining, self.pit_loss)
+        table = SuffixCostTable(self.race_table, state, remaining, self.pit_loss)
+        pinned = None if state.compound is None else table.index[state.compound]
+
+        ga = SuffixGeneticOptimizer(
+            self.tyre_models, remaining, pop_size=self.pop_size, generations=self.generations,
+            mutation_rate=self.mutation_rate, pit_loss=self.pit_loss, cost_table=table,
+            evaluator=SuffixEvaluator(table, rule_met=len(state.compounds_used) >= 2),
+            stall_generations=None, target_fitness=None,
+            time_budget=max(0.0, self.time_budget - (time.perf_counter() - started)),
+            pinned=pinned)
+        ga.population = self._seed_population(table, state, pinned)
+        best = ga.evolve(self.generations)
+
+        self.previous = (state.lap, [(ind.comps, ind.laps) for ind in ga.population])
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+
+        pit_laps = (state.lap + np.cumsum(best.laps[:-1])).tolist()
+        return {
+            'lap': state.lap,
+            'stints': best.genes,
+            'pit_laps': pit_laps,
+            'remaining_time': float(best.fitness),
+            'generations': ga.generations_run,
+            'latency_ms': latency * 1000,
+        }
+
+    def latency_stats(self):
+        """ Mean / P95 / max re-plan latency in milliseconds. """
+        if not self.latencies:
+            return {'calls': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ms = np.array(self.latencies) * 1000
+        return {
+            'calls': len(ms),
+            'mean_ms': float(ms.mean()),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'max_ms': float(ms.max()),
+        }
+
+    def _seed_population(self, table, state, pinned):
+        """
+        Warm start: last call's population shifted to the current lap, the
+        no-more-stops plan, the greedy plan on a cold start, then random
+        newcomers up to pop_size.
+        """
+        remaining = table.total_laps
+        seeds = []
+        if pinned is not None:
+            seeds.append((array('b', [pinned]), array('h', [remaining])))
+
+        if self.previous is not None and self.previous[0] <= state.lap:
+            driven = state.lap - self.previous[0]
+            n_keep = self.pop_size - max(1, int(self.pop_size * self.fresh_share))
+            seeds.extend(shift_genome(c, n, driven) for c, n in self.previous[1][:n_keep])
+        else:
+            if self.greedy_plan is None:
+                _, stints = GreedySolver(self.tyre_models, self.total_laps, pit_loss=self.pit_loss).solve()
+                index = self.race_table.index
+                self.greedy_plan = (array('b', [index[c] for c, _ in stints]), array('h', [n for _, n in stints]))
+            seeds.append(shift_genome(*self.greedy_plan, state.lap))
+
+        population = []
+        for comps, laps in seeds[:self.pop_size]:
+            if pinned is not None:
+                comps[0] = pinned
+            population.append(StrategyIndividual.from_arrays(table, comps, laps))
+        while len(population) < self.pop_size:
+            ind = StrategyIndividual(table)
+            if pinned is not None:
+                ind.comps[0] = pinned
+            population.append(ind)
+        return population
@@ -1,11 +1,11 @@
+import argparse
+import json
 import random
-import numpy as np  
-import fastf1
-import pandas as pd
-import config      
-from data_model import TyreDataModeler
-from optimizers import GreedySolver, GeneticOptimizer
-from visualization import plot_results   
+import config
+from instrumentation import recorder, MODES
+# Heavy modules (FastF1, pandas, NumPy, matplotlib) are imported by the
+# commands that need them, so `--help` or an optimizer run on cached
+# parameters starts instantly.
 
 def check_legality(strategy):
     """Checks if the strategy respects the 2-compound rule."""
@@ -44,7 +44,8 @@ def get_user_input():
     # --- 2. RETRIEVING CALENDAR ---
     print(f"\nDownloading {year} calendar from FastF1...")
     try:
-        schedule = fastf1.get_event_schedule(year, include_testing=False)
+        from data_model import fastf1_module
+        schedule = fastf1_module().get_event_schedule(year, include_testing=False)
         races = schedule[schedule['RoundNumber'] > 0][['EventName', 'Location', 'RoundNumber']].reset_index(drop=True)
         
         if races.empty:
@@ -80,42 +81,61 @@ def get_user_input():
         except ValueError:
             print("Error: Please enter a valid number.")
 
-def main():
-    # --- 0. SETUP RANDOM SEED ---
-    random.seed(config.RANDOM_SEED)
-    np.random.seed(config.RANDOM_SEED)
-    print(f"Random Seed set to: {config.RANDOM_SEED} (Reproducibility: ON)")
+def fit_race(race_year, race_gp, refresh=False):
+    """ PHASE 1: session download / cleaning / regression (or the model cache). Returns the modeler. """
+    from data_model import TyreDataModeler, MultiSessionModeler
+    from model_cache import ModelCache
 
-    # PHASE 0: INTERACTIVE INPUT
-    race_year, race_gp = get_user_input()
+    print(f"\n[1/4] Extracting Telemetry Data...")
+    cache = ModelCache() if config.MODEL_CACHE['ENABLED'] else None
+    if config.POOLING['ENABLED']:
+        data_engine = MultiSessionModeler.for_event(race_year, race_gp, cache=cache)
+        data_engine.load_and_clean_data(refresh=refresh)
+    else:
+        data_engine = TyreDataModeler(race_year, race_gp, cache=cache)
+        data_engine.load_and_clean_data(refresh=refresh)
+    data_engine.analyze_degradation()
+    return data_engine
 
-    print("\n==========================================")
-    print(f"   STARTING SIMULATION: {race_gp.upper()} {race_year}   ")
-    print("==========================================")
+def load_race(race_year, race_gp, refresh=False):
+    return fit_race(race_year, race_gp, refresh).get_simulation_data()
 
-    # PHASE 1: DATA PROCESS
-    print(f"\n[1/3] Extracting Telemetry Data...")
-    
-    try:
-        data_engine = TyreDataModeler(race_year, race_gp)
-        data_engine.load_and_clean_data()
-        data_engine.analyze_degradation()
-        
-        real_tyre_models, total_laps, dynamic_pit_loss = data_engine.get_simulation_data()
-        
-    except Exception as e:
-        print(f"\n[ERROR] Could not load race data: {e}")
-        print("Tip: Check internet connection or try another race.")
-        return
+def cached_race(race_year, race_gp):
+    """
+    Fitted parameters from the model cache only (no FastF1, no pandas), or None.
+    Always None with POOLING enabled: the cache holds single-session fits, and
+    the pooled fit is rebuilt from them (offline once every session is cached).
+    """
+    from model_cache import ModelCache
 
+    if config.POOLING['ENABLED']:
+        return None
+    entry = ModelCache().get(race_year, race_gp, 'R', dict(config.DATA_CLEANING), load_laps=False)
+    if entry is None:
+        return None
+    return entry['models'], entry['total_laps'], entry['pit_loss']
+
+def print_parameters(race_gp, real_tyre_models, total_laps, dynamic_pit_loss):
     print(f"\nExtracted Parameters for {race_gp}:")
     print(f"Total Laps: {total_laps}")
     print(f"Dynamic Pit Loss: {dynamic_pit_loss:.2f}s")
     for k, v in real_tyre_models.items():
         print(f"{k}: Base={v['base_pace']:.2f}s, Deg={v['degradation']:.3f}s/lap")
 
+def optimize(real_tyre_models, total_laps, dynamic_pit_loss):
+    """ PHASES 2-4: Greedy, Genetic Algorithm and exact DP. Returns a JSON-ready summary. """
+    import numpy as np
+    from robustness import RobustEvaluator
+    from optimizers import (GreedySolver, GeneticOptimizer, IslandGeneticOptimizer, ExactSolver, StrategyIndividual,
+                            evaluate_population)
+
+    # --- SETUP RANDOM SEED ---
+    random.seed(config.RANDOM_SEED)
+    np.random.seed(config.RANDOM_SEED)
+    print(f"Random Seed set to: {config.RANDOM_SEED} (Reproducibility: ON)")
+
     # PHASE 2: GREEDY ALGORITHM
-    print("\n[2/3] Running Greedy Algorithm...")
+    print("\n[2/4] Running Greedy Algorithm...")
     greedy = GreedySolver(real_tyre_models, total_laps, pit_loss=dynamic_pit_loss)
     greedy_time, greedy_stints = greedy.solve()
     
@@ -123,29 +143,347 @@ def main():
     print(f"Greedy Strategy: {greedy_stints} -> {check_legality(greedy_stints)}")
 
     # PHASE 3: GENETIC ALGORITHM
-    print("\n[3/3] Running Genetic Algorithm...")
+    print("\n[3/4] Running Genetic Algorithm...")
+    risk = RobustEvaluator(real_tyre_models, total_laps, pit_loss=dynamic_pit_loss)
+    robust = risk.objective != 'point'
+    if robust:
+        print(f"GA objective: {risk.objective} over {risk.n_scenarios} sampled races")
     
-    ga = GeneticOptimizer(
-        tyre_models=real_tyre_models, 
-        total_laps=total_laps,
-        pop_size=config.GA_SETTINGS['POP_SIZE'],       
-        generations=config.GA_SETTINGS['GENERATIONS'],    
-        mutation_rate=config.GA_SETTINGS['MUTATION_RATE'],
-        pit_loss=dynamic_pit_loss
-    )
+    if config.ISLAND_SETTINGS['ENABLED']:
+        print(f"Island model: {config.ISLAND_SETTINGS['ISLANDS']} islands in parallel")
+        ga = IslandGeneticOptimizer(
+            tyre_models=real_tyre_models,
+            total_laps=total_laps,
+            pop_size=config.GA_SETTINGS['POP_SIZE'],
+            generations=config.GA_SETTINGS['GENERATIONS'],
+            mutation_rate=config.GA_SETTINGS['MUTATION_RATE'],
+            pit_loss=dynamic_pit_loss,
+            evaluator=risk if robust else None
+        )
+    else:
+        ga = GeneticOptimizer(
+            tyre_models=real_tyre_models, 
+            total_laps=total_laps,
+            pop_size=config.GA_SETTINGS['POP_SIZE'],       
+            generations=config.GA_SETTINGS['GENERATIONS'],    
+            mutation_rate=config.GA_SETTINGS['MUTATION_RATE'],
+            pit_loss=dynamic_pit_loss,
+            evaluator=risk if robust else None
+        )
     
     best_solution = ga.run()
     
-    print(f"Best GA Time: {best_solution.fitness:.2f}s")
+    print(f"Stopped after {ga.generations_run} generations ({ga.stop_reason})")
+    if getattr(ga, 'fitness_cache', None) is not None:
+        stats = ga.fitness_cache.stats()
+        print(f"Fitness cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} saved)")
+    # With a robust objective the fitness is a Monte Carlo statistic: the
+    # race time comparable with greedy is the winner's deterministic time
+    ga_time = float(evaluate_population([best_solution], ga.cost_table)[0]) if robust else best_solution.fitness
+    if robust:
+        print(f"Best GA {risk.objective.upper()}: {best_solution.fitness:.2f}s")
+    print(f"Best GA Time: {ga_time:.2f}s")
     print(f"GA Strategy: {best_solution.genes} -> {check_legality(best_solution.genes)}")
     
-    improvement = greedy_time - best_solution.fitness
+    improvement = greedy_time - ga_time
     print(f"\n>>> STRATEGIC GAIN: {improvement:.2f} seconds <<<")
 
-    # PHASE 4: VISUALIZATION
+    # PHASE 4: EXACT SOLVER (GLOBAL OPTIMUM)
+    print("\n[4/4] Running Exact DP Solver...")
+    exact = ExactSolver(real_tyre_models, total_laps, pit_loss=dynamic_pit_loss, cost_table=ga.cost_table)
+    exact_time, exact_stints = exact.solve()
+
+    print(f"Optimal Time: {exact_time:.2f}s")
+    print(f"Optimal Strategy: {exact_stints} -> {check_legality(exact_stints)}")
+
+    # Greedy is re-scored on the same cost model to make the gap comparable
+    greedy_ind = StrategyIndividual(ga.cost_table, stints=[list(s) for s in greedy_stints])
+    greedy_scored = greedy_ind.calculate_fitness()
+    ga_scored = StrategyIndividual(ga.cost_table, stints=best_solution.genes).calculate_fitness()
+    print(f"GA Optimality Gap: {ga_scored - exact_time:.2f}s")
+    print(f"Greedy Optimality Gap: {greedy_scored - exact_time:.2f}s")
+
+    # Robustness under safety cars and parameter uncertainty
+    summary = risk.summarize_strategies([greedy_stints, best_solution.genes, exact_stints])
+    print(f"\nRisk over {risk.n_scenarios} sampled races (mean / P90 / CVaR{risk.alpha:.0%}):")
+    for i, name in enumerate(['Greedy', 'Genetic', 'Exact']):
+        print(f"  {name:<8} {summary['mean'][i]:.2f}s / {summary['p90'][i]:.2f}s / {summary['cvar'][i]:.2f}s")
+
+    return {
+        'history': [float(h) for h in ga.best_history],
+        'greedy_time': float(greedy_time),
+        'greedy_stints': [list(s) for s in greedy_stints],
+        'ga_time': float(ga_time),
+        'ga_objective': risk.objective,
+        'ga_fitness': float(best_solution.fitness),
+        # Greedy on the GA's objective: the baseline of the convergence chart
+        'greedy_fitness': float(risk.score([greedy_ind])[0]) if robust else float(greedy_time),
+        'ga_stints': best_solution.genes,
+        'exact_time': float(exact_time),
+        'exact_stints': exact_stints,
+    }
+
+def plot(result, output=None):
+    """ PHASE 5: VISUALIZATION (written to file) """
+    from visualization import plot_results
+
     print("\nGenerating results chart...")
-    plot_results(ga.best_history, greedy_time, greedy_stints, best_solution.genes, race_gp, race_year)
-    print("Chart generation completed.")
+    with recorder.phase('plot'):
+        baseline = result.get('greedy_fitness', result['greedy_time'])
+        path = plot_results(result['history'], baseline, result['greedy_stints'], result['ga_stints'],
+                            result['gp'], result['year'], output=output, alternatives=result.get('alternatives'))
+    print(f"Chart saved to {path}")
+
+# --- SUBCOMMANDS ---
+def cmd_fit(args):
+    real_tyre_models, total_laps, dynamic_pit_loss = load_race(args.year, args.gp, refresh=args.refresh)
+    print_parameters(args.gp, real_tyre_models, total_laps, dynamic_pit_loss)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'year': args.year, 'gp': args.gp, 'tyre_models': real_tyre_models,
+                       'total_laps': total_laps, 'pit_loss': dynamic_pit_loss}, f, indent=2, default=float)
+        print(f"Parameters saved to {args.out}")
+
+def resolve_race(args):
+    """ (year, gp, (tyre_models, total_laps, pit_loss)) from --params, the model cache or a fresh fit. """
+    if args.params:
+        with open(args.params) as f:
+            params = json.load(f)
+        race_year, race_gp = params['year'], params['gp']
+        race = params['tyre_models'], params['total_laps'], params['pit_loss']
+    else:
+        if args.year is None or args.gp is None:
+            raise SystemExit(f"{args.command}: give --params, or --year and --gp")
+        race_year, race_gp = args.year, args.gp
+        race = cached_race(race_year, race_gp)
+        if race is None:
+            print("Pooled fit: fitting from the sessions." if config.POOLING['ENABLED']
+                  else "Not in the model cache: fitting the race first.")
+            race = load_race(race_year, race_gp)
+    return race_year, race_gp, race
+
+def strategy_index(race):
+    from strategy_index import StrategyIndex
+
+    print("\nLoading the strategy index (built on the first run of a race)...")
+    return StrategyIndex.for_race(*race)
+
+def cmd_optimize(args):
+    race_year, race_gp, race = resolve_race(args)
+    print_parameters(race_gp, *race)
+
+    result = optimize(*race)
+    result.update({'year': race_year, 'gp': race_gp})
+    if args.index:
+        # Best alternative per stop count, drawn under the optimizers' plans
+        index = strategy_index(race)
+        result['alternatives'] = {f"Best {n}-stop": best[0]['stints']
+                                  for n in range(1, index.meta['max_stops'] + 1)
+                                  for best in [index.best(stops=n)] if best}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults saved to {args.out}")
+    if args.plot:
+        plot(result, args.plot)
+
+def cmd_index(args):
+    race_year, race_gp, race = resolve_race(args)
+    index = strategy_index(race)
+    print(f"{index.meta['enumerated']} legal strategies, top {index.meta['top_k']} kept per group")
+    for i, found in enumerate(index.best(stops=args.stops, start=args.start, n=args.top), 1):
+        print(f"{i:3}. {found['time']:.2f}s  {found['stops']}-stop  {found['stints']}")
+
+def compound_grid(specs):
+    """ ['SOFT=0.8,1,1.2', ...] -> {'SOFT': ['0.8', '1', '1.2'], ...} """
+    grid = {}
+    for spec in specs or []:
+        comp, sep, values = spec.partition('=')
+        if not sep or not values:
+            raise SystemExit(f"sweep: expected COMPOUND=v1,v2,... got '{spec}'")
+        grid[comp.upper()] = values.split(',')
+    return grid
+
+def cmd_sweep(args):
+    from sensitivity import SensitivitySweep
+
+    race_year, race_gp, race = resolve_race(args)
+    print_parameters(race_gp, *race)
+    sweep = SensitivitySweep(*race, max_workers=args.workers)
+    rows = sweep.run(pit_loss=args.pit_loss, degradation=compound_grid(args.degradation),
+                     base_pace=compound_grid(args.base_pace), max_life=compound_grid(args.max_life))
+    base_time, base_stints = sweep.baseline
+    print(f"\nBaseline optimum: {base_time:.2f}s {base_stints} ({len(base_stints) - 1}-stop)")
+    flips = [r for r in rows if r['stops'] != len(base_stints) - 1]
+    print(f"{len(rows)} grid points, optimal stop count changes at {len(flips)}")
+    for r in flips:
+        point = ', '.join(f"{k}={v:g}" for k, v in r.items() if k not in ('time', 'delta', 'stops', 'stints'))
+        print(f"  {point}: {r['stops']}-stop {r['stints']} ({r['delta']:+.2f}s)")
+
+    if args.out:
+        SensitivitySweep.write(rows, args.out)
+        print(f"Table saved to {args.out}")
+    if args.heatmap:
+        from visualization import plot_sensitivity
+
+        axes = [k for k in rows[0] if k not in ('time', 'delta', 'stops', 'stints')]
+        x = args.x or axes[0]
+        y = args.y or next((a for a in axes if a != x), None)
+        if y is None:
+            raise SystemExit("sweep: the heatmap needs two swept axes")
+        # Remaining axes are held at the value closest to the unperturbed race
+        neutral = {'pit_loss': race[2], 'degradation': 1.0, 'base_pace': 0.0}
+        where = {}
+        for axis in axes:
+            if axis not in (x, y):
+                values = sorted({r[axis] for r in rows})
+                target = neutral.get(axis.split(':')[0], config.MAX_LIFE.get(axis.split(':')[-1], values[0]))
+                where[axis] = min(values, key=lambda v: abs(v - target))
+        path = plot_sensitivity(rows, x, y, race_gp, race_year, output=args.heatmap, where=where)
+        print(f"Heatmap saved to {path}" + (f" ({where})" if where else ""))
+
+def cmd_prefetch(args):
+    from model_cache import ModelCache
+    from prefetch import SessionPrefetcher
+
+    cache = ModelCache() if config.MODEL_CACHE['ENABLED'] and not args.no_cache else None
+    prefetcher = SessionPrefetcher(cache=cache, max_workers=args.workers, retries=args.retries)
+    events = [(year, gp) for year in args.years for gp in args.gps] if args.gps else prefetcher.season_events(args.years)
+    print(f"Prefetching {len(events) * len(args.sessions)} sessions ({args.workers} at a time)...")
+    rows = prefetcher.prefetch_events(events, args.sessions)
+    for row in rows:
+        source = 'model cache' if row['from_cache'] else f"{row['attempts']} attempt(s)"
+        detail = f": {row['error']}" if row['error'] else ''
+        print(f"[{row['status'].upper()}] {row['gp']} {row['year']} {row['session']} "
+              f"({row['seconds']:.1f}s, {source}){detail}")
+    failed = sum(1 for r in rows if r['status'] != 'ok')
+    print(f"Done: {len(rows) - failed} ok, {failed} failed.")
+
+def cmd_plot(args):
+    with open(args.results) as f:
+        result = json.load(f)
+    plot(result, args.output)
+
+def cmd_team(args):
+    from team import TeamOptimizer
+
+    data_engine = fit_race(args.year, args.gp)
+    car_models = []
+    for driver in args.drivers:
+        tyre_models, total_laps, pit_loss = data_engine.get_simulation_data(driver=driver)
+        car_models.append(tyre_models)
+
+    print(f"\nTeam strategy for {', '.join(args.drivers)} ({args.runs} runs)...")
+    team = TeamOptimizer(car_models, total_laps, pit_loss=pit_loss, runs=args.runs)
+    fitness, genes, car_times = team.run()
+    independent_fitness, independent_genes = team.independent
+    for driver, stints, car_time, alone in zip(args.drivers, genes, car_times, independent_genes):
+        print(f"{driver}: {stints} ({car_time:.2f}s) | planned alone: {alone}")
+    print(f"Team time: {fitness:.2f}s (planned independently: {independent_fitness:.2f}s, "
+          f"gain {independent_fitness - fitness:.2f}s)")
+
+def run_interactive():
+    # PHASE 0: INTERACTIVE INPUT
+    race_year, race_gp = get_user_input()
+
+    print("\n==========================================")
+    print(f"   STARTING SIMULATION: {race_gp.upper()} {race_year}   ")
+    print("==========================================")
+
+    try:
+        real_tyre_models, total_laps, dynamic_pit_loss = load_race(race_year, race_gp)
+    except Exception as e:
+        print(f"\n[ERROR] Could not load race data: {e}")
+        print("Tip: Check internet connection or try another race.")
+        return
+    print_parameters(race_gp, real_tyre_models, total_laps, dynamic_pit_loss)
+
+    result = optimize(real_tyre_models, total_laps, dynamic_pit_loss)
+    result.update({'year': race_year, 'gp': race_gp})
+    plot(result)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="F1 pit-stop strategy optimizer (no command: interactive mode).")
+    parser.add_argument('--trace', choices=MODES, default=config.INSTRUMENTATION['MODE'],
+                        help="Instrumentation: JSON-lines events, + cProfile ('profile') or + tracemalloc ('memory')")
+    parser.add_argument('--trace-file', default=config.INSTRUMENTATION['EVENTS_FILE'], help="Events file")
+    parser.add_argument('--profile-file', default=config.INSTRUMENTATION['PROFILE_FILE'], help="pstats file")
+    commands = parser.add_subparsers(dest='command')
+
+    fit = commands.add_parser('fit', help="Download, clean and fit a race (fills the model cache)")
+    fit.add_argument('--year', type=int, required=True)
+    fit.add_argument('--gp', required=True, help="Grand Prix name, e.g. Monza")
+    fit.add_argument('--refresh', action='store_true', help="Ignore the model cache and download again")
+    fit.add_argument('--out', metavar='PATH', help="Also save the fitted parameters as JSON")
+    fit.set_defaults(func=cmd_fit)
+
+    opt = commands.add_parser('optimize', help="Run Greedy / GA / exact DP on fitted parameters")
+    opt.add_argument('--year', type=int)
+    opt.add_argument('--gp')
+    opt.add_argument('--params', metavar='PATH', help="Parameters saved by `fit --out` (no model cache lookup)")
+    opt.add_argument('--out', metavar='PATH', help="Save the results as JSON (input of `plot`)")
+    opt.add_argument('--plot', metavar='PATH', help="Also write the chart to this file")
+    opt.add_argument('--index', action='store_true', help="Add the best 1/2/3-stop plans from the strategy index")
+    opt.set_defaults(func=cmd_optimize)
+
+    team = commands.add_parser('team', help="Joint strategy for 2-4 cars sharing the pit box")
+    team.add_argument('--year', type=int, required=True)
+    team.add_argument('--gp', required=True)
+    team.add_argument('--drivers', nargs='+', required=True, help="Driver codes, e.g. VER PER")
+    team.add_argument('--runs', type=int, default=config.TEAM_SETTINGS['RUNS'], help="Parallel GA runs")
+    team.set_defaults(func=cmd_team)
+
+    idx = commands.add_parser('index', help="Query the exhaustive strategy index, e.g. best 2-stop on MEDIUM")
+    idx.add_argument('--year', type=int)
+    idx.add_argument('--gp')
+    idx.add_argument('--params', metavar='PATH', help="Parameters saved by `fit --out`")
+    idx.add_argument('--stops', type=int, help="Stop count (default: any)")
+    idx.add_argument('--start', type=str.upper, help="Starting compound, e.g. MEDIUM (default: any)")
+    idx.add_argument('--top', type=int, default=5, help="Strategies listed")
+    idx.set_defaults(func=cmd_index)
+
+    sweep = commands.add_parser('sweep', help="Optimal strategy over a grid of pit loss / tyre parameters")
+    sweep.add_argument('--year', type=int)
+    sweep.add_argument('--gp')
+    sweep.add_argument('--params', metavar='PATH', help="Parameters saved by `fit --out`")
+    sweep.add_argument('--pit-loss', type=float, nargs='+', help="Pit loss values (s)")
+    sweep.add_argument('--degradation', action='append', metavar='COMPOUND=X,..', help="Degradation multipliers")
+    sweep.add_argument('--base-pace', action='append', metavar='COMPOUND=S,..', help="Base pace offsets (s)")
+    sweep.add_argument('--max-life', action='append', metavar='COMPOUND=N,..', help="MAX_LIFE values (laps)")
+    sweep.add_argument('--workers', type=int, default=config.SENSITIVITY['WORKERS'], help="Processes")
+    sweep.add_argument('--out', metavar='PATH', help="Tidy table (.csv, otherwise JSON lines)")
+    sweep.add_argument('--heatmap', metavar='PATH', help="Stop-count heatmap image")
+    sweep.add_argument('--x', help="Heatmap x axis, e.g. pit_loss (default: first swept axis)")
+    sweep.add_argument('--y', help="Heatmap y axis, e.g. degradation:SOFT (default: second swept axis)")
+    sweep.set_defaults(func=cmd_sweep)
+
+    pre = commands.add_parser('prefetch', help="Download many sessions concurrently to warm the caches")
+    pre.add_argument('--years', type=int, nargs='+', required=True)
+    pre.add_argument('--gps', nargs='*', help="Grand Prix names (default: whole seasons)")
+    pre.add_argument('--sessions', nargs='+', default=list(config.PREFETCH['SESSIONS']), help="e.g. R FP2")
+    pre.add_argument('--workers', type=int, default=config.PREFETCH['WORKERS'], help="Concurrent downloads")
+    pre.add_argument('--retries', type=int, default=config.PREFETCH['RETRIES'], help="Retries per session")
+    pre.add_argument('--no-cache', action='store_true', help="Only warm the FastF1 cache (no model fits)")
+    pre.set_defaults(func=cmd_prefetch)
+
+    show = commands.add_parser('plot', help="Render the chart of a saved `optimize --out` result")
+    show.add_argument('results', help="Results JSON")
+    show.add_argument('--output', metavar='PATH', help="Image file (default: <gp>_<year>_strategy.png)")
+    show.set_defaults(func=cmd_plot)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    recorder.configure(args.trace, args.trace_file, args.profile_file)
+    try:
+        if args.command is None:
+            run_interactive()
+        else:
+            args.func(args)
+    finally:
+        if recorder.enabled:
+            recorder.stop()
+            print(f"Instrumentation events written to {args.trace_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
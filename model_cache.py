@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import config
+
+# Bump when the cleaning or fitting logic changes: old entries stop matching
+CACHE_VERSION = 5
+
+class ModelCache:
+    """
+    OFFLINE FITTED-MODEL STORE
+    Content-addressed on-disk store keyed by (year, gp, session_type, cleaning
+    parameters). Each entry holds the cleaned lap table and the fitted
+    models / pit_loss / total_laps, so a race can be re-simulated without
+    touching the network. Least-recently-used entries are evicted once the
+    store grows beyond `max_bytes`.
+    """
+    LAPS_FILE = 'laps.pkl'
+    META_FILE = 'meta.json'
+
+    def __init__(self, root=config.MODEL_CACHE['DIR'], max_bytes=config.MODEL_CACHE['MAX_BYTES']):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, year, gp, session_type, params):
+        """ SHA-256 of the canonical JSON description of the entry. """
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'year': year,
+            'gp': gp,
+            'session_type': session_type,
+            'params': params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, year, gp, session_type, params, load_laps=True):
+        """
+        Returns the cached entry as a dict, or None on a miss. With
+        load_laps=False only the fitted parameters are read ('laps' is None),
+        which does not import pandas.
+        """
+        entry_dir = os.path.join(self.root, self.key(year, gp, session_type, params))
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        laps = None
+        if load_laps:
+            import pandas as pd
+            try:
+                laps = pd.read_pickle(os.path.join(entry_dir, self.LAPS_FILE))
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+                # Corrupted or unreadable entry (truncated file, pickle of another
+                # pandas version...): drop it and treat as a miss
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return None
+
+        meta['last_access'] = time.time()
+        try:
+            self._write_meta(entry_dir, meta)
+        except OSError:
+            pass    # Entry evicted meanwhile: the access time is best effort
+        return {
+            'laps': laps,
+            'models': meta['models'],
+            'pit_loss': meta['pit_loss'],
+            'total_laps': meta['total_laps'],
+        }
+
+    def put(self, year, gp, session_type, params, laps, models, pit_loss, total_laps):
+        """ Stores an entry atomically, then enforces the size bound. """
+        key = self.key(year, gp, session_type, params)
+        meta = {
+            'year': year,
+            'gp': gp,
+            'session_type': session_type,
+            'params': params,
+            'models': {comp: {k: float(v) for k, v in m.items()} for comp, m in models.items()},
+            'pit_loss': float(pit_loss),
+            'total_laps': int(total_laps),
+            'created': time.time(),
+            'last_access': time.time(),
+        }
+
+        # Write to a temporary directory and rename, so readers never see half an entry
+        import pandas as pd
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        try:
+            # Plain DataFrame: FastF1's Laps subclass would pickle its whole session
+            pd.DataFrame(laps).reset_index(drop=True).to_pickle(os.path.join(tmp_dir, self.LAPS_FILE))
+            self._write_meta(tmp_dir, meta)
+            entry_dir = os.path.join(self.root, key)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Entry already there (refresh, or a concurrent writer of the same
+                # key): swap its files one by one, each rename is atomic
+                for name in (self.LAPS_FILE, self.META_FILE):
+                    os.replace(os.path.join(tmp_dir, name), os.path.join(entry_dir, name))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._evict(keep=key)
+        return key
+
+    def invalidate(self, year=None, gp=None, session_type=None):
+        """
+        Removes every entry matching the given fields (None matches anything).
+        Returns the number of entries removed.
+        """
+        removed = 0
+        for key, meta in self._entries():
+            if year is not None and meta.get('year') != year: continue
+            if gp is not None and meta.get('gp') != gp: continue
+            if session_type is not None and meta.get('session_type') != session_type: continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            removed += 1
+        return removed
+
+    def clear(self):
+        return self.invalidate()
+
+    def size(self):
+        """ Total bytes used by the store. """
+        return sum(self._entry_size(key) for key, _ in self._entries())
+
+    def _evict(self, keep=None):
+        """ Least-recently-used eviction until the store fits in max_bytes. """
+        if self.max_bytes is None:
+            return
+        entries = [(meta.get('last_access', 0.0), key, self._entry_size(key)) for key, meta in self._entries()]
+        total = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= size
+
+    def _entries(self):
+        for key in os.listdir(self.root):
+            if key.startswith('.'):
+                continue
+            meta = self._read_meta(os.path.join(self.root, key))
+            if meta is not None:
+                yield key, meta
+
+    def _entry_size(self, key):
+        entry_dir = os.path.join(self.root, key)
+        try:
+            return sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+        except OSError:
+            return 0    # Removed by a concurrent eviction / invalidation
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, self.META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        """ Temporary file + rename: a concurrent reader sees the old or the new meta, never half of one. """
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, prefix='.meta-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(entry_dir, self.META_FILE))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
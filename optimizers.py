@@ -1,23 +1,154 @@
+import os
 import random
+import time
+from array import array
+from itertools import accumulate
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import config  # Importiamo il file di configurazione
+from instrumentation import recorder
 
-class StrategyIndividual:
+FITNESS_BACKENDS = ('python', 'numpy')
+GA_OPERATORS = ('classic', 'structural')
+
+class RaceModel:
     """
-    GENETIC ALGORITHM CHROMOSOME
+    RACE PHYSICS
+    Single source of the cost model, compiled once per race into per-compound
+    arrays indexed by stint length (0..max_laps):
+    - lap_time[k, a]: lap time on compound k at tyre age a (linear
+      degradation + NON_LINEAR_WEAR cliff);
+    - cum[k, n]: time of the first n laps of a stint (prefix sums of lap_time),
+      so any stint, or any part of one, is an O(1) difference;
+    - first_stint / later_stint[k, n]: full stint cost including the
+      RACE_PENALTIES (traffic and warm-up on out-laps, short and over-limit
+      stints). Column 0 (empty stint) is inf.
+    MAX_LIFE / NON_LINEAR_WEAR / WARMUP_PENALTY come from config.py and can be
+    overridden per compound; a compound without physics is an error.
     """
-    def __init__(self, tyre_models, total_laps, stints=None, pit_loss=config.DEFAULT_PIT_LOSS):
-        self.tyre_models = tyre_models
+    def __init__(self, tyre_models, max_laps, max_life=None, wear=None, warmup=None, penalties=None):
+        self.compounds = tuple(tyre_models.keys())
+        self.index = {comp: k for k, comp in enumerate(self.compounds)}
+        self.max_laps = max_laps
+        self.max_life = self._physics(config.MAX_LIFE, max_life, 'MAX_LIFE').astype(np.int64)
+        self.wear = self._physics(config.NON_LINEAR_WEAR, wear, 'NON_LINEAR_WEAR')
+        self.warmup = self._physics(config.WARMUP_PENALTY, warmup, 'WARMUP_PENALTY')
+        self.penalties = dict(config.RACE_PENALTIES, **(penalties or {}))
+        self.compound_penalty = self.penalties['TWO_COMPOUND']
+
+        base = np.array([[tyre_models[c]['base_pace'] for c in self.compounds]], dtype=float)
+        deg = np.array([[tyre_models[c]['degradation'] for c in self.compounds]], dtype=float)
+        self.lap_time = self.lap_curves(base, deg)[0]
+        self.cum = np.zeros((len(self.compounds), max_laps + 1))
+        np.cumsum(self.lap_time, axis=1, out=self.cum[:, 1:])
+
+        # Penalty curves by stint length
+        pen = self.penalties
+        n = np.arange(max_laps + 1)
+        over_limit = np.maximum(n[None, :] - self.max_life[:, None], 0) * pen['OVER_LIMIT']
+        out_lap = (np.minimum(pen['TRAFFIC_LAPS'], n) * pen['TRAFFIC'])[None, :] + self.warmup[:, None]
+        short = np.maximum(pen['SHORT_STINT_LAPS'] - n, 0) * pen['SHORT_STINT']
+        self.first_stint = self.cum + over_limit
+        self.later_stint = self.cum + out_lap + short[None, :] + over_limit
+        self.first_stint[:, 0] = np.inf
+        self.later_stint[:, 0] = np.inf
+        for arr in (self.lap_time, self.cum, self.first_stint, self.later_stint):
+            arr.setflags(write=False)
+
+    def _physics(self, defaults, overrides, name):
+        values = dict(defaults, **(overrides or {}))
+        missing = [c for c in self.compounds if c not in values]
+        if missing:
+            raise ValueError(f"No {name} for compound(s) {missing}: add them to config.{name}")
+        return np.array([values[c] for c in self.compounds], dtype=float)
+
+    def with_models(self, tyre_models):
+        """ Same physics (max life, wear, warm-up, penalties) compiled for other base pace / degradation. """
+        per_compound = lambda values: dict(zip(self.compounds, values.tolist()))
+        return RaceModel(tyre_models, self.max_laps, max_life=per_compound(self.max_life),
+                         wear=per_compound(self.wear), warmup=per_compound(self.warmup), penalties=self.penalties)
+
+    def lap_curves(self, base, deg):
+        """ Lap time by tyre age for (scenarios x compounds) base pace / degradation arrays. """
+        age = np.arange(self.max_laps, dtype=float)
+        return base[:, :, None] + deg[:, :, None] * age + self.wear[None, :, None] * age ** 2
+
+class StintCostTable:
+    """
+    PRECOMPUTED STINT COSTS
+    Built once per race from a RaceModel (compiled from tyre_models and the
+    config physics when not given) and pit_loss, and shared by reference: there
+    are only compounds x total_laps distinct stints for the first stint and
+    for the later ones. Column 0 (empty stint) is inf.
+    """
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS, race_model=None):
+        if race_model is None or race_model.max_laps < total_laps:
+            race_model = RaceModel(tyre_models, total_laps)
+        self.race_model = race_model
+        self.compounds = race_model.compounds
+        self.index = race_model.index
         self.total_laps = total_laps
         self.pit_loss = pit_loss
+        self.compound_penalty = race_model.compound_penalty
+
+        first = race_model.first_stint[:, :total_laps + 1]
+        later = race_model.later_stint[:, :total_laps + 1]
+        self.first_array = first
+        self.later_array = later
+
+        # Plain tuples of Python floats indexed by compound code for the scalar
+        # path (faster than NumPy indexing)
+        self.first = tuple(tuple(row) for row in first.tolist())
+        self.later = tuple(tuple(row) for row in later.tolist())
+
+class StrategyIndividual:
+    """
+    GENETIC ALGORITHM CHROMOSOME
+    Compact genome: compound codes (int8, index into cost_table.compounds) and
+    stint lengths (int16) in two fixed-width arrays. `genes` converts to and
+    from the readable [[compound, laps], ...] form.
+    """
+    __slots__ = ('cost_table', 'comps', 'laps', 'fitness')
+
+    def __init__(self, cost_table, stints=None):
+        self.cost_table = cost_table
         if stints:
             self.genes = stints
         else:
-            self.genes = self._random_init()
+            self.comps, self.laps = self._random_init()
         self.fitness = 0.0
 
+    @classmethod
+    def from_arrays(cls, cost_table, comps, laps):
+        """ Builds an individual directly from genome arrays (no conversion). """
+        ind = cls.__new__(cls)
+        ind.cost_table = cost_table
+        ind.comps = comps
+        ind.laps = laps
+        ind.fitness = 0.0
+        return ind
+
+    @property
+    def genes(self):
+        compounds = self.cost_table.compounds
+        return [[compounds[c], n] for c, n in zip(self.comps, self.laps)]
+
+    @genes.setter
+    def genes(self, stints):
+        index = self.cost_table.index
+        self.comps = array('b', [index[comp] for comp, _ in stints])
+        self.laps = array('h', [n for _, n in stints])
+
+    def genome_key(self):
+        """ Immutable, hashable snapshot of the genome (used by FitnessCache). """
+        return (self.comps.tobytes(), self.laps.tobytes())
+
     def _random_init(self):
+        total_laps = self.cost_table.total_laps
+        n_comp = len(self.cost_table.compounds)
         n_stops = random.randint(1, 3) 
-        possible_cuts = list(range(1, self.total_laps))
+        possible_cuts = list(range(1, total_laps))
         
         if possible_cuts:
             n_stops = min(n_stops, len(possible_cuts))
@@ -25,88 +156,365 @@ class StrategyIndividual:
         else:
             cuts = []
         
-        stints = []
+        comps = array('b')
+        laps = array('h')
         prev_cut = 0
         for cut in cuts:
-            comp = random.choice(list(self.tyre_models.keys()))
-            stints.append([comp, cut - prev_cut]) 
+            comps.append(random.randrange(n_comp))
+            laps.append(cut - prev_cut)
             prev_cut = cut
         
-        comp = random.choice(list(self.tyre_models.keys()))
-        stints.append([comp, self.total_laps - prev_cut])
-        return stints
+        comps.append(random.randrange(n_comp))
+        laps.append(total_laps - prev_cut)
+        return comps, laps
 
     def calculate_fitness(self):
-        """ OBJECTIVE FUNCTION """
-        total_time = 0.0
-        compounds_used = set(s[0] for s in self.genes)
+        """ OBJECTIVE FUNCTION (pure table lookups) """
+        table = self.cost_table
+        comps, laps = self.comps, self.laps
         penalty = 0
-        if len(compounds_used) < 2:
-            penalty = 1000.0 
+        if len(set(comps)) < 2:
+            penalty = table.compound_penalty
 
-        for i, (comp, laps) in enumerate(self.genes):
-            model = self.tyre_models[comp]
-            
-            # 1. Linear Component + Non-linear Component
-            linear_time = (model['base_pace'] * laps) + (model['degradation'] * (laps * (laps - 1) / 2))
-            
-            wear_factor = config.NON_LINEAR_WEAR.get(comp, 0.002)
-            n = laps
-            sum_squares = ((n - 1) * n * (2 * n - 1)) / 6
-            nonlinear_time = wear_factor * sum_squares
-            
-            stint_time = linear_time + nonlinear_time
-            
-            # 2. Logistic and physics penalties
-            if i > 0: 
-                traffic_laps = min(3, laps)
-                stint_time += traffic_laps * 1.5 
-                
-                # Warm-up da config
-                w_pen = config.WARMUP_PENALTY.get(comp, 3.0)
-                stint_time += w_pen 
-
-                if laps < 10:
-                    stint_time += (10 - laps) * 4.0 
-
-            # Limite massimo da config
-            limit = config.MAX_LIFE.get(comp, 40)
-            if laps > limit:
-                over_limit = laps - limit
-                stint_time += over_limit * 20.0 
-
-            total_time += stint_time
-            if i < len(self.genes) - 1:
-                total_time += self.pit_loss
+        total_time = table.first[comps[0]][laps[0]]
+        for i in range(1, len(comps)):
+            total_time += table.pit_loss
+            total_time += table.later[comps[i]][laps[i]]
 
         self.fitness = total_time + penalty
         return self.fitness
 
+def population_to_arrays(population):
+    """
+    Packs the population into padded 2-D matrices (individuals x stints):
+    compound codes, stint lengths and the number of stints per individual.
+    """
+    n_stints = np.fromiter((len(ind.comps) for ind in population), dtype=np.int64, count=len(population))
+    flat_comps = np.frombuffer(b''.join([ind.comps.tobytes() for ind in population]), dtype=np.int8)
+    flat_laps = np.frombuffer(b''.join([ind.laps.tobytes() for ind in population]), dtype=np.int16)
+
+    # Scatter the concatenated genomes into their (row, stint) slots
+    rows = np.repeat(np.arange(len(population)), n_stints)
+    cols = np.arange(len(flat_comps)) - np.repeat(np.cumsum(n_stints) - n_stints, n_stints)
+    width = int(n_stints.max())
+    comp_idx = np.zeros((len(population), width), dtype=np.int8)
+    laps = np.zeros((len(population), width), dtype=np.int16)
+    comp_idx[rows, cols] = flat_comps
+    laps[rows, cols] = flat_laps
+    return comp_idx, laps, n_stints
+
+def population_from_arrays(cost_table, comp_idx, laps, n_stints):
+    """ Inverse of population_to_arrays. """
+    return [
+        StrategyIndividual.from_arrays(cost_table, array('b', comp_idx[row, :n].tobytes()),
+                                       array('h', laps[row, :n].tobytes()))
+        for row, n in enumerate(n_stints.tolist())
+    ]
+
+def evaluate_population(population, cost_table, compound_penalty=None):
+    """
+    VECTORIZED OBJECTIVE FUNCTION
+    Scores the whole population in one NumPy pass by gathering stint costs from
+    the shared table. Terms are added in the same order as
+    StrategyIndividual.calculate_fitness, so the results match bit-for-bit.
+    `compound_penalty` (default: the table's) is charged when fewer than 2
+    compounds are used; 0 when the rule is already satisfied, e.g. by the
+    stints run before a re-plan.
+    """
+    if not population:
+        return np.zeros(0)
+
+    # --- PADDED GENOME MATRICES (individuals x stints) ---
+    comp_idx, laps, n_stints = population_to_arrays(population)
+    comp_idx = comp_idx.astype(np.intp)
+    laps = laps.astype(np.intp)
+    valid = np.arange(comp_idx.shape[1]) < n_stints[:, None]
+
+    # Accumulate column by column to keep the scalar summation order
+    total_time = cost_table.first_array[comp_idx[:, 0], laps[:, 0]]
+    for col in range(1, comp_idx.shape[1]):
+        stint_time = cost_table.later_array[comp_idx[:, col], laps[:, col]]
+        total_time = total_time + np.where(valid[:, col], cost_table.pit_loss, 0.0)
+        total_time = total_time + np.where(valid[:, col], stint_time, 0.0)
+
+    # Two-compound rule
+    used = np.zeros((len(population), len(cost_table.compounds)), dtype=bool)
+    for k in range(len(cost_table.compounds)):
+        used[:, k] = ((comp_idx == k) & valid).any(axis=1)
+    if compound_penalty is None:
+        compound_penalty = cost_table.compound_penalty
+    penalty = np.where(used.sum(axis=1) < 2, compound_penalty, 0.0)
+
+    return total_time + penalty
+
+class FitnessCache:
+    """
+    GENOME-KEYED FITNESS MEMO
+    Bounded LRU map from StrategyIndividual.genome_key() to fitness, shared
+    across the generations of a run so elites and duplicate children are not
+    re-scored. `hits` / `misses` show how much work it saves.
+    """
+    def __init__(self, maxsize=config.GA_SETTINGS['FITNESS_CACHE_SIZE']):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        fitness = self._data.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return fitness
+
+    def put(self, key, fitness):
+        self._data[key] = fitness
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._data),
+        }
+
+def population_diversity(population):
+    """
+    DIVERSITY METRICS
+    Share of distinct genomes (1.0 = all different) and number of individuals
+    per stop count, e.g. {1: 50, 2: 30}.
+    """
+    if not population:
+        return {'unique': 0.0, 'stops': {}}
+    stops = {}
+    for ind in population:
+        n = len(ind.laps) - 1
+        stops[n] = stops.get(n, 0) + 1
+    unique = len({ind.genome_key() for ind in population}) / len(population)
+    return {'unique': unique, 'stops': dict(sorted(stops.items()))}
+
+def stopping_reason(history, elapsed, stall_generations=None, min_rel_improvement=0.0,
+                    time_budget=None, target_fitness=None):
+    """
+    CONVERGENCE CHECK
+    Returns why the evolution should stop ('target_fitness', 'time_budget',
+    'stall') or None to keep going. `history` is the best fitness per generation.
+    """
+    if not history:
+        return None
+    if target_fitness is not None and history[-1] <= target_fitness:
+        return 'target_fitness'
+    if time_budget is not None and elapsed >= time_budget:
+        return 'time_budget'
+    if stall_generations and len(history) > stall_generations:
+        reference = history[-stall_generations - 1]
+        improvement = (reference - history[-1]) / abs(reference) if reference else 0.0
+        if improvement <= min_rel_improvement:
+            return 'stall'
+    return None
+
+def crossover(p1, p2, operators='classic', max_stops=config.GA_SETTINGS['MAX_STOPS']):
+    """
+    GA CROSSOVER (shared by GeneticOptimizer and the team GA)
+    'classic' mixes the compounds of p2 into p1's stint lengths; 'structural'
+    alternates that with cut_crossover.
+    """
+    if operators == 'structural' and random.random() < 0.5:
+        return cut_crossover(p1, p2, max_stops)
+    comps = array('b', p1.comps)
+    other = p2.comps
+    for i in range(len(comps)):
+        if random.random() > 0.5:
+            comps[i] = other[i % len(other)]
+    return StrategyIndividual.from_arrays(p1.cost_table, comps, array('h', p1.laps))
+
+def cut_crossover(p1, p2, max_stops=config.GA_SETTINGS['MAX_STOPS']):
+    """
+    CUT-POINT CROSSOVER
+    Cuts both parents at a lap where one of them stops: the child races
+    p1's stints up to the cut and p2's from the cut to the flag, so the
+    number of stops can change. Children over max_stops copy p1.
+    """
+    cuts = sorted(set(accumulate(p1.laps[:-1])) | set(accumulate(p2.laps[:-1])))
+    if not cuts:
+        return StrategyIndividual.from_arrays(p1.cost_table, array('b', p1.comps), array('h', p1.laps))
+    cut = random.choice(cuts)
+
+    comps, laps = array('b'), array('h')
+    done = 0
+    for comp, n in zip(p1.comps, p1.laps):
+        comps.append(comp)
+        laps.append(min(n, cut - done))
+        done += n
+        if done >= cut:
+            break
+    done = 0
+    for comp, n in zip(p2.comps, p2.laps):
+        if done + n > cut:
+            comps.append(comp)
+            laps.append(done + n - max(done, cut))
+        done += n
+
+    if len(laps) > max_stops + 1:
+        comps, laps = array('b', p1.comps), array('h', p1.laps)
+    return StrategyIndividual.from_arrays(p1.cost_table, comps, laps)
+
+def mutate(ind, mutation_rate, operators='classic', max_stops=config.GA_SETTINGS['MAX_STOPS']):
+    """
+    GA MUTATION (in place, shared by GeneticOptimizer and the team GA)
+    'classic': new compound for a stint or a pit stop moved by up to 2 laps;
+    'structural': see structural_mutate.
+    """
+    if operators == 'structural':
+        structural_mutate(ind, mutation_rate, max_stops)
+        return
+    if random.random() < mutation_rate:
+        if random.random() < 0.5:
+            idx = random.randint(0, len(ind.comps)-1)
+            ind.comps[idx] = random.randrange(len(ind.cost_table.compounds))
+        elif len(ind.laps) > 1:
+            idx = random.randint(0, len(ind.laps)-2)
+            transfer = random.randint(-2, 2)
+            if ind.laps[idx] + transfer > 1 and ind.laps[idx+1] - transfer > 1:
+                ind.laps[idx] += transfer
+                ind.laps[idx+1] -= transfer
+
+def structural_mutate(ind, mutation_rate, max_stops=config.GA_SETTINGS['MAX_STOPS']):
+    """
+    STINT-BOUNDARY MUTATION
+    Up to two moves per child, each with probability mutation_rate: new
+    compound for a stint, move a pit stop by up to 3 laps, add a stop
+    (split a stint) or remove one (merge two stints).
+    """
+    for _ in range(2):
+        if random.random() < mutation_rate:
+            _structural_move(ind, max_stops)
+
+def _structural_move(ind, max_stops):
+    comps, laps = ind.comps, ind.laps
+    n = len(laps)
+    n_comp = len(ind.cost_table.compounds)
+    move = random.random()
+    if move < 0.3:
+        comps[random.randrange(n)] = random.randrange(n_comp)
+    elif move < 0.6:
+        if n > 1:
+            idx = random.randrange(n - 1)
+            transfer = random.randint(-3, 3)
+            if laps[idx] + transfer >= 1 and laps[idx + 1] - transfer >= 1:
+                laps[idx] += transfer
+                laps[idx + 1] -= transfer
+    elif move < 0.8:
+        idx = random.randrange(n)
+        if n <= max_stops and laps[idx] >= 2:
+            split = random.randint(1, laps[idx] - 1)
+            laps.insert(idx + 1, laps[idx] - split)
+            laps[idx] = split
+            comps.insert(idx + 1, random.randrange(n_comp))
+    elif n > 1:
+        idx = random.randrange(n - 1)
+        laps[idx] += laps[idx + 1]
+        if random.random() < 0.5:
+            comps[idx] = comps[idx + 1]
+        del laps[idx + 1]
+        del comps[idx + 1]
+
 class GeneticOptimizer:
     # Usiamo i default da GA_SETTINGS se non specificati
     def __init__(self, tyre_models, total_laps, 
                  pop_size=config.GA_SETTINGS['POP_SIZE'], 
                  generations=config.GA_SETTINGS['GENERATIONS'], 
                  mutation_rate=config.GA_SETTINGS['MUTATION_RATE'], 
-                 pit_loss=config.DEFAULT_PIT_LOSS):
+                 pit_loss=config.DEFAULT_PIT_LOSS,
+                 fitness_backend=config.GA_SETTINGS['FITNESS_BACKEND'],
+                 cost_table=None,
+                 stall_generations=config.GA_SETTINGS['STALL_GENERATIONS'],
+                 min_rel_improvement=config.GA_SETTINGS['MIN_REL_IMPROVEMENT'],
+                 time_budget=config.GA_SETTINGS['TIME_BUDGET'],
+                 target_fitness=config.GA_SETTINGS['TARGET_FITNESS'],
+                 fitness_cache_size=config.GA_SETTINGS['FITNESS_CACHE_SIZE'],
+                 evaluator=None,
+                 operators=config.GA_SETTINGS['OPERATORS'],
+                 max_stops=config.GA_SETTINGS['MAX_STOPS']):
+        if fitness_backend not in FITNESS_BACKENDS:
+            raise ValueError(f"Unknown fitness backend '{fitness_backend}' (choose from {FITNESS_BACKENDS})")
+        if operators not in GA_OPERATORS:
+            raise ValueError(f"Unknown GA operators '{operators}' (choose from {GA_OPERATORS})")
         self.tyre_models = tyre_models
         self.total_laps = total_laps
         self.pit_loss = pit_loss
         self.pop_size = pop_size
-        self.generations = generations
+        self.generations = generations      # Upper bound: the stopping criteria may end earlier
         self.mutation_rate = mutation_rate
+        self.fitness_backend = fitness_backend
+        self.stall_generations = stall_generations
+        self.min_rel_improvement = min_rel_improvement
+        self.time_budget = time_budget
+        self.target_fitness = target_fitness
+        # Optional objective override, e.g. robustness.RobustEvaluator (mean / CVaR)
+        self.evaluator = evaluator
+        # Shared by every individual of every generation
+        if cost_table is None and evaluator is not None:
+            cost_table = evaluator.cost_table
+        self.cost_table = cost_table or StintCostTable(tyre_models, total_laps, pit_loss)
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size else None
+        # 'classic': compound crossover + lap shifts (fixed stop count);
+        # 'structural': cut-point crossover + add/remove-stop mutation
+        self.operators = operators
+        self.max_stops = max_stops
         self.population = []
         self.best_history = []
+        self.diversity_history = []     # population_diversity() of every generation
+        self.stop_reason = None
+        self.generations_run = 0
 
     def run(self):
-        self.population = [StrategyIndividual(self.tyre_models, self.total_laps, pit_loss=self.pit_loss) for _ in range(self.pop_size)]
-        
-        for gen in range(self.generations):
+        with recorder.phase('genetic', pop_size=self.pop_size, laps=self.total_laps):
+            self.population = [StrategyIndividual(self.cost_table) for _ in range(self.pop_size)]
+            return self.evolve(self.generations)
+
+    def evolve(self, generations, scored=False):
+        """
+        Evolves the current population for at most `generations` generations,
+        stopping early when a convergence criterion is met (see stop_reason).
+        scored=True: the population already carries its fitness (e.g. from a
+        previous island epoch), so the first generation is not re-scored.
+        """
+        started = time.perf_counter()
+        self.stop_reason = 'max_generations'
+        if scored and self.fitness_cache is not None:
             for ind in self.population:
-                ind.calculate_fitness()
+                self.fitness_cache.put(ind.genome_key(), ind.fitness)
+        for gen in range(generations):
+            gen_started = time.perf_counter()
+            if gen or not scored:
+                self._evaluate()
             
             self.population.sort(key=lambda x: x.fitness)
             self.best_history.append(self.population[0].fitness)
+            self.generations_run += 1
+            diversity = population_diversity(self.population)
+            self.diversity_history.append(diversity)
+            if recorder.enabled:
+                eval_s = time.perf_counter() - gen_started
+
+            reason = stopping_reason(self.best_history, time.perf_counter() - started,
+                                     self.stall_generations, self.min_rel_improvement,
+                                     self.time_budget, self.target_fitness)
+            if reason:
+                self.stop_reason = reason
+                if recorder.enabled:
+                    self._record_generation(gen_started, eval_s, diversity)
+                break
             
             next_gen = self.population[:2]
             while len(next_gen) < self.pop_size:
@@ -116,114 +524,458 @@ class GeneticOptimizer:
                 self._mutate(child)
                 next_gen.append(child)
             self.population = next_gen
-            
+            if recorder.enabled:
+                self._record_generation(gen_started, eval_s, diversity)
+
+        if recorder.enabled:
+            cache = self.fitness_cache.stats() if self.fitness_cache is not None else None
+            recorder.event('evolve', generations=self.generations_run, stop_reason=self.stop_reason,
+                           best=self.population[0].fitness, seconds=time.perf_counter() - started, cache=cache)
         return self.population[0]
 
+    def _record_generation(self, gen_started, eval_s, diversity):
+        recorder.event('generation', gen=self.generations_run, best=self.best_history[-1],
+                       eval_s=eval_s, seconds=time.perf_counter() - gen_started, diversity=diversity)
+
+    def _evaluate(self):
+        if self.fitness_cache is None:
+            self._score(self.population)
+            return
+
+        # Only genomes never seen before are scored (once, even if duplicated)
+        cache = self.fitness_cache
+        pending = {}
+        for ind in self.population:
+            key = ind.genome_key()
+            if key in pending:
+                pending[key].append(ind)
+                cache.hits += 1
+                continue
+            fitness = cache.get(key)
+            if fitness is None:
+                pending[key] = [ind]
+            else:
+                ind.fitness = fitness
+        if not pending:
+            return
+
+        representatives = [group[0] for group in pending.values()]
+        self._score(representatives)
+        for key, group in pending.items():
+            fitness = group[0].fitness
+            cache.put(key, fitness)
+            for ind in group[1:]:
+                ind.fitness = fitness
+
+    def _score(self, individuals):
+        recorder.count('fitness_evals', len(individuals))
+        if self.evaluator is not None:
+            scores = self.evaluator.score(individuals)
+            for ind, score in zip(individuals, scores):
+                ind.fitness = float(score)
+        elif self.fitness_backend == 'numpy':
+            scores = evaluate_population(individuals, self.cost_table)
+            for ind, score in zip(individuals, scores):
+                ind.fitness = float(score)
+        else:
+            for ind in individuals:
+                ind.calculate_fitness()
+
     def _tournament(self):
         return min(random.sample(self.population, 3), key=lambda x: x.fitness)
 
     def _crossover(self, p1, p2):
-        new_genes = []
-        for i, (comp, laps) in enumerate(p1.genes):
-            new_comp = p2.genes[i % len(p2.genes)][0] if random.random() > 0.5 else comp
-            new_genes.append([new_comp, laps])
-        return StrategyIndividual(self.tyre_models, self.total_laps, stints=new_genes, pit_loss=self.pit_loss)
+        return crossover(p1, p2, self.operators, self.max_stops)
 
     def _mutate(self, ind):
-        if random.random() < self.mutation_rate:
-            if random.random() < 0.5:
-                idx = random.randint(0, len(ind.genes)-1)
-                ind.genes[idx][0] = random.choice(list(self.tyre_models.keys()))
-            elif len(ind.genes) > 1:
-                idx = random.randint(0, len(ind.genes)-2)
-                transfer = random.randint(-2, 2)
-                if ind.genes[idx][1] + transfer > 1 and ind.genes[idx+1][1] - transfer > 1:
-                    ind.genes[idx][1] += transfer
-                    ind.genes[idx+1][1] -= transfer
+        mutate(ind, self.mutation_rate, self.operators, self.max_stops)
+
+def island_seed(island, epoch):
+    """ Deterministic per-island, per-epoch seed derived from config.RANDOM_SEED. """
+    return int(np.random.SeedSequence([config.RANDOM_SEED, island, epoch]).generate_state(1)[0])
+
+def _evolve_island(tyre_models, cost_table, genes, fitness, generations, mutation_rate, fitness_backend, seed,
+                   pop_size, robust=None):
+    """
+    ISLAND WORKER (runs in a child process)
+    Evolves one sub-population and returns it sorted, with fitness and history.
+    `fitness` (returned by the previous epoch) is reused, not recomputed.
+    `robust` (RobustEvaluator.spec()) rebuilds the caller's evaluator, same
+    scenarios included, so every island scores the same objective.
+    """
+    random.seed(seed)
+    evaluator = None
+    if robust is not None:
+        from robustness import RobustEvaluator
+        evaluator = RobustEvaluator(tyre_models, cost_table.total_laps, cost_table=cost_table, **robust)
+    ga = GeneticOptimizer(tyre_models, cost_table.total_laps, pop_size=pop_size, generations=generations,
+                          mutation_rate=mutation_rate, pit_loss=cost_table.pit_loss,
+                          fitness_backend=fitness_backend, cost_table=cost_table,
+                          stall_generations=None, time_budget=None, target_fitness=None, evaluator=evaluator)
+    if genes is None:
+        ga.population = [StrategyIndividual(cost_table) for _ in range(pop_size)]
+    else:
+        ga.population = [StrategyIndividual(cost_table, stints=g) for g in genes]
+        for ind, f in zip(ga.population, fitness):
+            ind.fitness = f
+    ga.evolve(generations, scored=genes is not None)
+
+    # Score the final generation so the caller can pick migrants
+    ga._evaluate()
+    ga.population.sort(key=lambda x: x.fitness)
+    return [ind.genes for ind in ga.population], [ind.fitness for ind in ga.population], ga.best_history
+
+class IslandGeneticOptimizer:
+    """
+    ISLAND MODEL GENETIC ALGORITHM
+    N sub-populations evolve in parallel processes and exchange their elites
+    every `migration_interval` generations (ring topology).
+    An `evaluator` (robustness.RobustEvaluator) replaces the point estimate
+    with its objective on every island, as in GeneticOptimizer.
+    """
+    def __init__(self, tyre_models, total_laps,
+                 n_islands=config.ISLAND_SETTINGS['ISLANDS'],
+                 migration_interval=config.ISLAND_SETTINGS['MIGRATION_INTERVAL'],
+                 migrants=config.ISLAND_SETTINGS['MIGRANTS'],
+                 max_workers=config.ISLAND_SETTINGS['WORKERS'],
+                 pop_size=config.GA_SETTINGS['POP_SIZE'],
+                 generations=config.GA_SETTINGS['GENERATIONS'],
+                 mutation_rate=config.GA_SETTINGS['MUTATION_RATE'],
+                 pit_loss=config.DEFAULT_PIT_LOSS,
+                 fitness_backend=config.GA_SETTINGS['FITNESS_BACKEND'],
+                 cost_table=None,
+                 stall_generations=config.GA_SETTINGS['STALL_GENERATIONS'],
+                 min_rel_improvement=config.GA_SETTINGS['MIN_REL_IMPROVEMENT'],
+                 time_budget=config.GA_SETTINGS['TIME_BUDGET'],
+                 target_fitness=config.GA_SETTINGS['TARGET_FITNESS'],
+                 evaluator=None):
+        if fitness_backend not in FITNESS_BACKENDS:
+            raise ValueError(f"Unknown fitness backend '{fitness_backend}' (choose from {FITNESS_BACKENDS})")
+        self.tyre_models = tyre_models
+        self.total_laps = total_laps
+        self.pit_loss = pit_loss
+        self.robust = evaluator.spec() if evaluator is not None else None
+        if cost_table is None and evaluator is not None:
+            cost_table = evaluator.cost_table
+        self.n_islands = n_islands
+        self.migration_interval = max(1, migration_interval)
+        self.migrants = migrants
+        self.max_workers = max_workers or min(n_islands, os.cpu_count() or 1)
+        self.pop_size = pop_size
+        self.generations = generations
+        self.mutation_rate = mutation_rate
+        self.fitness_backend = fitness_backend
+        self.cost_table = cost_table or StintCostTable(tyre_models, total_laps, pit_loss)
+        # Stopping criteria are checked at migration boundaries
+        self.stall_generations = stall_generations
+        self.min_rel_improvement = min_rel_improvement
+        self.time_budget = time_budget
+        self.target_fitness = target_fitness
+        self.best_history = []
+        self.island_histories = [[] for _ in range(n_islands)]
+        self.stop_reason = None
+        self.generations_run = 0
+
+    def run(self):
+        islands = [None] * self.n_islands
+        scores = [None] * self.n_islands
+        done, epoch = 0, 0
+        started = time.perf_counter()
+        self.stop_reason = 'max_generations'
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while done < self.generations:
+                epoch_gens = min(self.migration_interval, self.generations - done)
+                results = list(executor.map(
+                    _evolve_island,
+                    [self.tyre_models] * self.n_islands,
+                    [self.cost_table] * self.n_islands,
+                    islands,
+                    scores,
+                    [epoch_gens] * self.n_islands,
+                    [self.mutation_rate] * self.n_islands,
+                    [self.fitness_backend] * self.n_islands,
+                    [island_seed(i, epoch) for i in range(self.n_islands)],
+                    [self.pop_size] * self.n_islands,
+                    [self.robust] * self.n_islands,
+                ))
+
+                for i, (genes, fitness, history) in enumerate(results):
+                    islands[i], scores[i] = genes, fitness
+                    self.island_histories[i].extend(history)
+                # Merged history: best island at every generation
+                for gen in range(done, done + epoch_gens):
+                    self.best_history.append(min(h[gen] for h in self.island_histories))
+
+                done += epoch_gens
+                epoch += 1
+                self.generations_run = done
+
+                reason = stopping_reason(self.best_history, time.perf_counter() - started,
+                                         self.stall_generations, self.min_rel_improvement,
+                                         self.time_budget, self.target_fitness)
+                if reason:
+                    self.stop_reason = reason
+                    break
+                if done < self.generations:
+                    self._migrate(islands, scores)
+
+        best_island = min(range(self.n_islands), key=lambda i: scores[i][0])
+        best = StrategyIndividual(self.cost_table, stints=islands[best_island][0])
+        best.fitness = scores[best_island][0]
+        return best
+
+    def _migrate(self, islands, scores):
+        """ Ring migration: the elites of island i (and their fitness) replace the worst of island i+1. """
+        if self.n_islands < 2 or self.migrants <= 0:
+            return
+        k = min(self.migrants, self.pop_size - 1)
+        elites = [[list(g) for g in genes[:k]] for genes in islands]
+        elite_scores = [list(fitness[:k]) for fitness in scores]
+        for i in range(self.n_islands):
+            target = (i + 1) % self.n_islands
+            islands[target][-k:] = [[list(g) for g in genes] for genes in elites[i]]
+            scores[target][-k:] = elite_scores[i]
 
 class GreedySolver:
     """
     SMART GREEDY (EVALUATIVE)
+    Lap-time curves are precomputed per compound, pit triggers are found with
+    vectorized searches and the look-ahead horizon is a prefix-sum lookup, so
+    the solver advances one stint (not one lap) per step.
     """
-    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS):
+    PIT_THRESHOLD_LOSS = 2.5
+    TRAFFIC_FEAR_FACTOR = 1.5
+    PREDICTION_HORIZON = 20
+
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS, race_model=None):
         self.tyre_models = tyre_models
         self.total_laps = total_laps
         self.pit_loss = pit_loss
+        if race_model is None or race_model.max_laps != total_laps:
+            race_model = RaceModel(tyre_models, total_laps)
+        self.race_model = race_model
+        self.compounds = list(race_model.compounds)
+        base = np.array([[tyre_models[c]['base_pace'] for c in self.compounds]], dtype=float)
+        self.prefix = race_model.cum[None]
+        self.trigger = self._triggers(race_model, base, race_model.lap_time[None])
+
+    @classmethod
+    def _triggers(cls, race_model, base, curves):
+        """
+        PIT TRIGGERS (scenario x compound)
+        Stint length at which each compound triggers a stop, from the lap-time
+        curves of the RaceModel: `k` laps in, the tyre is unsafe when
+        k >= MAX_LIFE and slow when the k-th lap exceeds base pace + threshold.
+        """
+        max_laps = curves.shape[2]
+        slow = curves > (base + cls.PIT_THRESHOLD_LOSS + cls.TRAFFIC_FEAR_FACTOR)[:, :, None]
+        first_slow = np.where(slow.any(axis=2), slow.argmax(axis=2) + 1, max_laps + 1)
+        return np.minimum(first_slow, np.maximum(race_model.max_life, 1)[None, :])
 
     def solve(self):
-        current_compound = min(self.tyre_models, key=lambda k: self.tyre_models[k]['base_pace'])
-        current_tyre_age = 0
+        with recorder.phase('greedy', laps=self.total_laps):
+            return self._solve()
+
+    def _solve(self):
+        compounds = self.compounds
+        prefix = self.prefix[0].tolist()
+        trigger = self.trigger[0].tolist()
+        warmup = self.race_model.warmup.tolist()
+        traffic_laps = self.race_model.penalties['TRAFFIC_LAPS']
+        traffic = self.race_model.penalties['TRAFFIC']
+        no_stop = self.total_laps + 1
+
+        current = min(range(len(compounds)), key=lambda c: self.tyre_models[compounds[c]]['base_pace'])
+        compounds_used = {current}
         stints = []
-        total_time = 0
-        compounds_used = {current_compound} 
-        
-        pit_threshold_loss = 2.5     
-        traffic_fear_factor = 1.5    
-        stint_start_lap = 0
-        
-        for lap in range(1, self.total_laps + 1):
-            model = self.tyre_models[current_compound]
-            
-            # Lap Time Calculation
-            wear_factor = config.NON_LINEAR_WEAR.get(current_compound, 0.002)
-            linear_deg = model['degradation'] * current_tyre_age
-            nonlinear_deg = wear_factor * (current_tyre_age ** 2)
-            lap_time = model['base_pace'] + linear_deg + nonlinear_deg
-            
-            current_tyre_age += 1
-            
-            # Pit Stop Conditions (Limits from config)
-            limit = config.MAX_LIFE.get(current_compound, 40)
-            is_unsafe = current_tyre_age >= limit 
-            is_slow = (lap_time > model['base_pace'] + pit_threshold_loss + traffic_fear_factor)
-            
-            laps_remaining = self.total_laps - lap
-            must_change = (laps_remaining <= 2) and (len(compounds_used) < 2)
-            
-            if (is_unsafe or is_slow or must_change) and (laps_remaining > 0):
-                stints.append([current_compound, lap - stint_start_lap])
-                total_time += self.pit_loss
-                
-                # --- SMARTEST CHOICE FOR NEXT TYRES ---
-                candidates = list(self.tyre_models.keys())
-                if must_change:
-                    candidates = [c for c in candidates if c not in compounds_used]
-                    if not candidates: candidates = list(self.tyre_models.keys())
-
-                best_candidate = None
-                best_predicted_time = float('inf')
-                
-                prediction_horizon = min(20, laps_remaining)
-                
-                for cand in candidates:
-                    cand_model = self.tyre_models[cand]
-                    cand_wear = config.NON_LINEAR_WEAR.get(cand, 0.002)
-                    
-                    # Initial Warm-up cost (From config)
-                    w_pen = config.WARMUP_PENALTY.get(cand, 3.0)
-                    predicted_time = w_pen 
-                    
-                    # Simulate next stint
-                    for t in range(prediction_horizon):
-                        lin = cand_model['degradation'] * t
-                        non_lin = cand_wear * (t**2)
-                        predicted_time += cand_model['base_pace'] + lin + non_lin
-                    
-                    if predicted_time < best_predicted_time:
-                        best_predicted_time = predicted_time
-                        best_candidate = cand
-                
-                current_compound = best_candidate
-                compounds_used.add(current_compound)
-                current_tyre_age = 0
-                stint_start_lap = lap
-
-                # --- WARM UP PENALTIES ---
-                total_time += config.WARMUP_PENALTY.get(current_compound, 3.0)
-                traffic_laps = min(3, laps_remaining)
-                total_time += traffic_laps * 1.5
-                
-            total_time += lap_time
-            
-        stints.append([current_compound, self.total_laps - stint_start_lap])
-        return total_time, stints
\ No newline at end of file
+        total_time = 0.0
+        done = 0
+
+        while True:
+            left = self.total_laps - done
+            one_compound = len(compounds_used) < 2
+
+            # First lap of the stint where any pit condition holds
+            must_at = max(left - 2, 1) if one_compound else no_stop
+            k = min(trigger[current], must_at)
+            if k >= left:
+                total_time += prefix[current][left]
+                stints.append([compounds[current], left])
+                break
+            total_time += prefix[current][k]
+            stints.append([compounds[current], k])
+
+            # --- SMARTEST CHOICE FOR NEXT TYRES ---
+            laps_remaining = left - k
+            candidates = range(len(compounds))
+            if one_compound and laps_remaining <= 2:
+                candidates = [c for c in candidates if c not in compounds_used] or candidates
+            horizon = min(self.PREDICTION_HORIZON, laps_remaining)
+            best = min(candidates, key=lambda c: warmup[c] + prefix[c][horizon])
+
+            # --- PIT LOSS + WARM UP + TRAFFIC ---
+            total_time += self.pit_loss + warmup[best] + min(traffic_laps, laps_remaining) * traffic
+            current = best
+            compounds_used.add(current)
+            done += k
+
+        return total_time, stints
+
+    @classmethod
+    def solve_batch(cls, scenarios):
+        """
+        BATCH SCENARIO MODE
+        Solves many (tyre_models, pit_loss, total_laps) scenarios at once, all
+        vectorized across scenarios. Every tyre_models dict must have the same
+        compounds. Returns a list of (total_time, stints) like solve().
+        """
+        if not scenarios:
+            return []
+        compounds = list(scenarios[0][0].keys())
+        n_scen, n_comp = len(scenarios), len(compounds)
+        total_laps = np.array([sc[2] for sc in scenarios], dtype=np.int64)
+        pit_loss = np.array([sc[1] for sc in scenarios], dtype=float)
+        max_laps = int(total_laps.max())
+
+        base = np.array([[sc[0][c]['base_pace'] for c in compounds] for sc in scenarios], dtype=float)
+        deg = np.array([[sc[0][c]['degradation'] for c in compounds] for sc in scenarios], dtype=float)
+
+        # Shared physics, per-scenario lap-time curves and their prefix sums
+        race_model = RaceModel(scenarios[0][0], max_laps)
+        warmup = race_model.warmup
+        traffic_laps = race_model.penalties['TRAFFIC_LAPS']
+        traffic = race_model.penalties['TRAFFIC']
+        curves = race_model.lap_curves(base, deg)
+        prefix = np.zeros((n_scen, n_comp, max_laps + 1))
+        np.cumsum(curves, axis=2, out=prefix[:, :, 1:])
+        trigger = cls._triggers(race_model, base, curves)
+
+        # --- STATE, ONE ROW PER SCENARIO ---
+        rows = np.arange(n_scen)
+        comp_range = np.arange(n_comp)
+        current = base.argmin(axis=1)
+        done = np.zeros(n_scen, dtype=np.int64)
+        used = (1 << current).astype(np.int64)
+        total = np.zeros(n_scen)
+        active = np.ones(n_scen, dtype=bool)
+        stints = [[] for _ in range(n_scen)]
+
+        while active.any():
+            left = total_laps - done
+            one_compound = ((used[:, None] >> comp_range) & 1).sum(axis=1) < 2
+
+            # First lap of the stint where any pit condition holds
+            must_at = np.where(one_compound, np.maximum(left - 2, 1), max_laps + 1)
+            k = np.minimum(trigger[rows, current], must_at)
+            pits = active & (k < left)
+            k = np.where(pits, k, left)
+
+            total = total + np.where(active, prefix[rows, current, np.where(active, k, 0)], 0.0)
+            for i in np.flatnonzero(active):
+                stints[i].append([compounds[current[i]], int(k[i])])
+
+            if pits.any():
+                laps_remaining = left - k
+
+                # --- SMARTEST CHOICE FOR NEXT TYRES (horizon as prefix sums) ---
+                horizon = np.minimum(cls.PREDICTION_HORIZON, np.maximum(laps_remaining, 0))
+                predicted = warmup[None, :] + prefix[rows[:, None], comp_range[None, :], horizon[:, None]]
+                unused = (used[:, None] >> comp_range[None, :]) & 1 == 0
+                restrict = one_compound & (laps_remaining <= 2) & unused.any(axis=1)
+                allowed = np.where(restrict[:, None], unused, True)
+                best = np.where(allowed, predicted, np.inf).argmin(axis=1)
+
+                # --- PIT LOSS + WARM UP + TRAFFIC ---
+                penalty = pit_loss + warmup[best] + np.minimum(traffic_laps, laps_remaining) * traffic
+                total = total + np.where(pits, penalty, 0.0)
+                current = np.where(pits, best, current)
+                used = np.where(pits, used | (1 << best), used)
+                done = np.where(pits, done + k, done)
+
+            active = pits
+
+        return [(float(total[i]), stints[i]) for i in range(n_scen)]
+
+class ExactSolver:
+    """
+    EXACT DYNAMIC PROGRAMMING
+    The objective is a sum of per-stint costs plus pit loss and the two-compound
+    penalty, so the global optimum is found with a DP over
+    (laps completed, compounds-used bitmask, stop count).
+    """
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS, max_stops=3, cost_table=None):
+        self.tyre_models = tyre_models
+        self.total_laps = total_laps
+        self.pit_loss = pit_loss
+        self.max_stops = max_stops
+        self.cost_table = cost_table or StintCostTable(tyre_models, total_laps, pit_loss)
+
+    def solve(self):
+        with recorder.phase('exact', laps=self.total_laps, max_stops=self.max_stops):
+            return self._solve()
+
+    def _solve(self):
+        compounds = self.cost_table.compounds
+        first_cost = self.cost_table.first_array
+        later_cost = self.cost_table.later_array
+        n_comp = len(compounds)
+        n_masks = 1 << n_comp
+        L = self.total_laps
+
+        # transition[k][j, e] = cost of a later stint on compound k from lap j to lap e
+        laps_done = np.arange(L + 1)
+        length = laps_done[None, :] - laps_done[:, None]
+        feasible = length >= 1
+        transition = [np.where(feasible, later_cost[k][np.clip(length, 0, L)], np.inf) for k in range(n_comp)]
+
+        # best[s][mask][e]: cheapest way to complete e laps with s stops using `mask`
+        best = np.full((self.max_stops + 1, n_masks, L + 1), np.inf)
+        prev_lap = np.zeros((self.max_stops + 1, n_masks, L + 1), dtype=np.int64)
+        prev_mask = np.zeros((self.max_stops + 1, n_masks, L + 1), dtype=np.int64)
+        comp_of = np.zeros((self.max_stops + 1, n_masks, L + 1), dtype=np.int64)
+
+        for k in range(n_comp):
+            best[0, 1 << k] = first_cost[k]
+            comp_of[0, 1 << k] = k
+
+        for s in range(self.max_stops):
+            for mask in range(1, n_masks):
+                start = best[s, mask]
+                if not np.isfinite(start).any():
+                    continue
+                for k in range(n_comp):
+                    candidate = (start[:, None] + self.pit_loss) + transition[k]
+                    j = candidate.argmin(axis=0)
+                    value = candidate[j, laps_done]
+                    new_mask = mask | (1 << k)
+                    better = value < best[s + 1, new_mask]
+                    best[s + 1, new_mask] = np.where(better, value, best[s + 1, new_mask])
+                    prev_lap[s + 1, new_mask] = np.where(better, j, prev_lap[s + 1, new_mask])
+                    prev_mask[s + 1, new_mask] = np.where(better, mask, prev_mask[s + 1, new_mask])
+                    comp_of[s + 1, new_mask] = np.where(better, k, comp_of[s + 1, new_mask])
+
+        # Two-compound rule applied on the final state
+        best_time, best_state = float('inf'), None
+        for s in range(self.max_stops + 1):
+            for mask in range(1, n_masks):
+                total = best[s, mask, L]
+                if bin(mask).count('1') < 2:
+                    total = total + self.cost_table.compound_penalty
+                if total < best_time:
+                    best_time, best_state = total, (s, mask)
+
+        # Backtrack the stints
+        stints = []
+        s, mask = best_state
+        e = L
+        while True:
+            k = comp_of[s, mask, e]
+            if s == 0:
+                stints.append([compounds[k], int(e)])
+                break
+            j = prev_lap[s, mask, e]
+            stints.append([compounds[k], int(e - j)])
+            s, mask, e = s - 1, prev_mask[s, mask, e], j
+        stints.reverse()
+        return float(best_time), stints
@@ -0,0 +1,115 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pandas.errors import ParserError
+import config
+from instrumentation import recorder
+from data_model import TyreDataModeler, fastf1_module
+
+# Unknown event or session type: retrying cannot help
+PERMANENT_ERRORS = (ValueError, KeyError)
+# Truncated or garbled responses: ValueError subclasses, but worth retrying
+TRANSIENT_ERRORS = (json.JSONDecodeError, UnicodeDecodeError, ParserError)
+
+def is_permanent(error):
+    return isinstance(error, PERMANENT_ERRORS) and not isinstance(error, TRANSIENT_ERRORS)
+
+class SessionPrefetcher:
+    """
+    CONCURRENT SESSION PREFETCH
+    Loads many sessions at once through TyreDataModeler in a bounded thread
+    pool, so a season-wide run starts with the FastF1 HTTP cache and the
+    fitted-model cache (when given) already warm. Failed downloads are retried
+    with exponential backoff and jitter; unknown events / sessions
+    (PERMANENT_ERRORS) fail at once, but decode errors of a garbled response
+    (TRANSIENT_ERRORS) are retried.
+    `provider` is the session source: FastF1 by default, or any object with
+    get_session(year, gp, session_type) and get_event_schedule(year,
+    include_testing) returning the same tables, e.g. a local stub for offline
+    runs.
+    """
+    def __init__(self, provider=None, cache=None, max_workers=config.PREFETCH['WORKERS'],
+                 retries=config.PREFETCH['RETRIES'], backoff=config.PREFETCH['BACKOFF'],
+                 max_backoff=config.PREFETCH['MAX_BACKOFF'], cleaning=config.DATA_CLEANING):
+        self.provider = provider
+        self.cache = cache          # Optional model_cache.ModelCache
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cleaning = dict(cleaning)
+        self._jitter = random.Random()  # Own generator: the seeded global one is left untouched
+
+    def _with_retries(self, label, func, *args):
+        """ Runs func(*args) with retries; returns (result, attempts, error message or None). """
+        for attempt in range(1, self.retries + 2):
+            try:
+                return func(*args), attempt, None
+            except Exception as e:
+                if is_permanent(e) or attempt > self.retries:
+                    return None, attempt, str(e)
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * self._jitter.uniform(0.5, 1.0)
+                recorder.count('prefetch_retries')
+                print(f"Retry {attempt}/{self.retries} for {label} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def season_events(self, years):
+        """ Championship rounds of several seasons as (year, EventName) pairs; schedules are fetched concurrently. """
+        provider = self.provider or fastf1_module()
+
+        def schedule(year):
+            table = provider.get_event_schedule(year, include_testing=False)
+            return [(year, name) for name in table[table['RoundNumber'] > 0]['EventName']]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda y: self._with_retries(f"{y} schedule", schedule, y), years))
+        events = []
+        for year, (found, _, error) in zip(years, results):
+            if error is not None:
+                raise RuntimeError(f"Could not download the {year} schedule: {error}")
+            events.extend(found)
+        return events
+
+    def _load(self, year, gp, session_type):
+        modeler = TyreDataModeler(year, gp, session_type, cache=self.cache, cleaning=self.cleaning,
+                                  provider=self.provider)
+        modeler.load_and_clean_data()
+        if self.cache is not None and not modeler.from_cache:
+            # Fit and store the entry so the next run is offline
+            modeler.analyze_degradation()
+            modeler.get_simulation_data()
+        return modeler.from_cache
+
+    def _fetch(self, session):
+        year, gp, session_type = session
+        started = time.perf_counter()
+        from_cache, attempts, error = self._with_retries(f"{gp} {year} {session_type}", self._load, *session)
+        return {
+            'year': year,
+            'gp': gp,
+            'session': session_type,
+            'status': 'error' if error else 'ok',
+            'error': error,
+            'attempts': attempts,
+            'from_cache': bool(from_cache),
+            'seconds': time.perf_counter() - started,
+        }
+
+    def prefetch(self, sessions):
+        """
+        Loads every (year, gp, session_type) with at most `max_workers` at once.
+        Returns one status row per session, in input order; a failed session
+        does not stop the others.
+        """
+        sessions = list(sessions)
+        with recorder.phase('prefetch', sessions=len(sessions), workers=self.max_workers):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                rows = list(pool.map(self._fetch, sessions))
+        for row in rows:
+            recorder.event('prefetch_session', **row)
+        return rows
+
+    def prefetch_events(self, events, session_types=config.PREFETCH['SESSIONS']):
+        """ prefetch() of the given session types of every (year, gp) event. """
+        return self.prefetch([(year, gp, s) for year, gp in events for s in session_types])
@@ -0,0 +1,144 @@
+import numpy as np
+import config
+from optimizers import StintCostTable, StrategyIndividual, evaluate_population, population_to_arrays
+
+OBJECTIVES = ('point', 'mean', 'cvar')
+
+class RobustEvaluator:
+    """
+    MONTE CARLO ROBUSTNESS ENGINE
+    Scores strategies against thousands of sampled races instead of a single
+    point estimate. Each scenario draws:
+    - base pace / degradation per compound from the regression standard errors,
+      jointly with their covariance (the fitted intercept and slope are
+      anti-correlated, independent draws would overstate the spread);
+    - the pit loss from a normal around the measured value;
+    - safety-car periods, during which a pit stop costs SC_PIT_FACTOR x pit loss.
+    Race time is linear in base pace, degradation and pit loss, so the whole
+    (strategies x scenarios) matrix is a couple of matrix products.
+    """
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS,
+                 n_scenarios=config.ROBUSTNESS['SCENARIOS'],
+                 objective=config.ROBUSTNESS['OBJECTIVE'],
+                 alpha=config.ROBUSTNESS['CVAR_ALPHA'],
+                 seed=config.RANDOM_SEED, cost_table=None):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}' (choose from {OBJECTIVES})")
+        self.tyre_models = tyre_models
+        self.total_laps = total_laps
+        self.nominal_pit_loss = pit_loss
+        self.objective = objective
+        self.alpha = alpha
+        self.cost_table = cost_table or StintCostTable(tyre_models, total_laps, pit_loss)
+
+        # Scenario-independent part of every stint: non-linear wear + penalties,
+        # with the physics of cost_table (which may override the config)
+        zero_models = {c: {'base_pace': 0.0, 'degradation': 0.0} for c in self.cost_table.compounds}
+        self.fixed_table = StintCostTable(zero_models, total_laps, pit_loss=0.0,
+                                          race_model=self.cost_table.race_model.with_models(zero_models))
+        self.sample(n_scenarios, seed)
+
+    def sample(self, n_scenarios, seed=config.RANDOM_SEED):
+        """ Draws a new set of race scenarios (common to every strategy scored). """
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        settings = config.ROBUSTNESS
+        models = [self.tyre_models[c] for c in self.cost_table.compounds]
+        n_comp = len(models)
+
+        base = np.array([m['base_pace'] for m in models], dtype=float)
+        deg = np.array([m['degradation'] for m in models], dtype=float)
+        base_se = np.array([m.get('base_pace_se', settings['BASE_PACE_STD']) for m in models], dtype=float)
+        deg_se = np.array([m.get('degradation_se', settings['DEG_REL_STD'] * abs(m['degradation'])) for m in models],
+                          dtype=float)
+        cov = np.nan_to_num(np.array([m.get('base_deg_cov', 0.0) for m in models], dtype=float))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rho = np.clip(np.where(base_se * deg_se > 0, cov / (base_se * deg_se), 0.0), -1.0, 1.0)
+
+        # Bivariate normal per compound: the degradation draw leans on the base-pace draw by rho
+        self.n_scenarios = n_scenarios
+        z_base = rng.standard_normal((n_scenarios, n_comp))
+        z_deg = rho * z_base + np.sqrt(1 - rho ** 2) * rng.standard_normal((n_scenarios, n_comp))
+        self.base = base + z_base * base_se
+        self.deg = deg + z_deg * deg_se
+        self.pit_loss = np.maximum(self.nominal_pit_loss + rng.standard_normal(n_scenarios) * settings['PIT_LOSS_STD'], 0.0)
+
+        # Safety-car periods: pit_factor[s, lap] multiplies a stop made at the end of `lap`
+        self.pit_factor = np.ones((n_scenarios, self.total_laps + 1))
+        n_sc = rng.poisson(settings['SC_RATE'], size=n_scenarios)
+        owners = np.repeat(np.arange(n_scenarios), n_sc)
+        starts = rng.integers(1, self.total_laps + 1, size=len(owners))
+        lo, hi = settings['SC_LAPS']
+        lengths = rng.integers(lo, hi + 1, size=len(owners))
+        for offset in range(hi):
+            lap = starts + offset
+            hit = (offset < lengths) & (lap <= self.total_laps)
+            self.pit_factor[owners[hit], lap[hit]] = settings['SC_PIT_FACTOR']
+
+    def time_matrix(self, population):
+        """ Race time of every strategy in every scenario, shape (strategies, scenarios). """
+        comp_idx, laps, n_stints = population_to_arrays(population)
+        comp_idx = comp_idx.astype(np.intp)
+        laps = laps.astype(np.intp)
+        n_pop, width = comp_idx.shape
+        n_comp = len(self.cost_table.compounds)
+        valid = np.arange(width) < n_stints[:, None]
+
+        # Laps and sum of tyre ages per compound: time = A @ base + B @ deg + fixed
+        rows = np.broadcast_to(np.arange(n_pop)[:, None], comp_idx.shape)
+        laps_on = np.zeros((n_pop, n_comp))
+        ages_on = np.zeros((n_pop, n_comp))
+        np.add.at(laps_on, (rows[valid], comp_idx[valid]), laps[valid])
+        np.add.at(ages_on, (rows[valid], comp_idx[valid]), (laps * (laps - 1) / 2)[valid])
+
+        fixed = self.fixed_table.first_array[comp_idx[:, 0], laps[:, 0]].copy()
+        for col in range(1, width):
+            fixed += np.where(valid[:, col], self.fixed_table.later_array[comp_idx[:, col], laps[:, col]], 0.0)
+        used = np.zeros((n_pop, n_comp), dtype=bool)
+        used[rows[valid], comp_idx[valid]] = True
+        fixed += np.where(used.sum(axis=1) < 2, self.cost_table.compound_penalty, 0.0)
+
+        times = laps_on @ self.base.T + ages_on @ self.deg.T + fixed[:, None]
+
+        # Pit stops at the end of every stint but the last
+        if width > 1:
+            stop_laps = np.cumsum(laps, axis=1)[:, :-1]
+            is_stop = np.arange(width - 1) < (n_stints - 1)[:, None]
+            factors = self.pit_factor[:, stop_laps] * is_stop          # (scenarios, strategies, stops)
+            times += (self.pit_loss[:, None] * factors.sum(axis=2)).T
+        return times
+
+    def spec(self):
+        """ Keyword arguments that rebuild this evaluator, same scenarios included (e.g. in a worker process). """
+        return {'pit_loss': self.nominal_pit_loss, 'n_scenarios': self.n_scenarios,
+                'objective': self.objective, 'alpha': self.alpha, 'seed': self.seed}
+
+    def summarize(self, population):
+        """ Expected time and risk percentiles per strategy. """
+        times = self.time_matrix(population)
+        return {
+            'mean': times.mean(axis=1),
+            'std': times.std(axis=1),
+            'p50': np.percentile(times, 50, axis=1),
+            'p90': np.percentile(times, 90, axis=1),
+            'cvar': self._cvar(times),
+        }
+
+    def summarize_strategies(self, strategies):
+        """ Same as summarize() for [[compound, laps], ...] strategies. """
+        return self.summarize([StrategyIndividual(self.cost_table, stints=s) for s in strategies])
+
+    def score(self, population):
+        """ Objective used by the GA: point estimate, expected time or CVaR. """
+        if self.objective == 'point':
+            return evaluate_population(population, self.cost_table)
+        times = self.time_matrix(population)
+        if self.objective == 'mean':
+            return times.mean(axis=1)
+        return self._cvar(times)
+
+    def _cvar(self, times):
+        """ Mean of the worst (1 - alpha) share of outcomes per strategy. """
+        tail = max(1, int(np.ceil((1 - self.alpha) * times.shape[1])))
+        worst = np.partition(times, times.shape[1] - tail, axis=1)[:, -tail:]
+        return worst.mean(axis=1)
@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import config
+from instrumentation import recorder
+from optimizers import RaceModel, StintCostTable, ExactSolver
+
+def sweep_axes(pit_loss=None, degradation=None, base_pace=None, max_life=None):
+    """
+    GRID AXES as [(name, values), ...]:
+    - 'pit_loss': absolute pit loss values (s);
+    - 'degradation:<COMPOUND>': multipliers of the fitted degradation (1.2 = 20% faster wear);
+    - 'base_pace:<COMPOUND>': seconds added to the fitted base pace;
+    - 'max_life:<COMPOUND>': MAX_LIFE values (laps).
+    """
+    axes = []
+    if pit_loss:
+        axes.append(('pit_loss', [float(v) for v in pit_loss]))
+    for name, grid, cast in (('degradation', degradation, float), ('base_pace', base_pace, float),
+                             ('max_life', max_life, int)):
+        for comp, values in (grid or {}).items():
+            axes.append((f"{name}:{comp}", [cast(v) for v in values]))
+    return axes
+
+def perturbed_models(tyre_models, point):
+    """ Tyre models and MAX_LIFE overrides of one grid point ({axis: value}). """
+    models = {comp: dict(m) for comp, m in tyre_models.items()}
+    max_life = {}
+    for axis, value in point.items():
+        if axis == 'pit_loss':
+            continue
+        name, comp = axis.split(':')
+        if comp not in models:
+            raise ValueError(f"Sweep axis '{axis}': no fitted model for {comp}")
+        if name == 'degradation':
+            models[comp]['degradation'] *= value
+        elif name == 'base_pace':
+            models[comp]['base_pace'] += value
+        else:
+            max_life[comp] = value
+    return models, max_life
+
+def _solve_variant(tyre_models, total_laps, max_stops, point, pit_losses):
+    """ One physics variant at every pit loss: the RaceModel is compiled once and shared. """
+    models, max_life = perturbed_models(tyre_models, point)
+    race_model = RaceModel(models, total_laps, max_life=max_life)
+    results = []
+    for pit_loss in pit_losses:
+        table = StintCostTable(models, total_laps, pit_loss, race_model=race_model)
+        results.append(ExactSolver(models, total_laps, pit_loss=pit_loss, max_stops=max_stops,
+                                   cost_table=table).solve())
+    return results
+
+class SensitivitySweep:
+    """
+    PARAMETER SENSITIVITY
+    Solves the race to optimality (ExactSolver) at every point of a grid over
+    pit loss, per-compound degradation / base pace and MAX_LIFE. Grid points
+    that share the physics share one RaceModel (only the pit loss changes), and
+    the physics variants are spread over a process pool. The result is a tidy
+    table: one row per grid point with the axis values, the optimal time and
+    stints, the stop count and the delta to the unperturbed race.
+    """
+    def __init__(self, tyre_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS,
+                 max_stops=config.SENSITIVITY['MAX_STOPS'], max_workers=config.SENSITIVITY['WORKERS']):
+        self.tyre_models = tyre_models
+        self.total_laps = total_laps
+        self.pit_loss = pit_loss
+        self.max_stops = max_stops
+        self.max_workers = max_workers
+        self.baseline = None
+        self.rows = []
+
+    def run(self, pit_loss=None, degradation=None, base_pace=None, max_life=None):
+        """ Returns the tidy table (list of dicts); see sweep_axes for the grid arguments. """
+        axes = sweep_axes(pit_loss, degradation, base_pace, max_life)
+        names = [name for name, _ in axes]
+        pit_values = dict(axes).get('pit_loss', [self.pit_loss])
+        physics_axes = [(name, values) for name, values in axes if name != 'pit_loss']
+        variants = [dict(zip([n for n, _ in physics_axes], combo))
+                    for combo in product(*[values for _, values in physics_axes])]
+
+        with recorder.phase('sensitivity', points=len(variants) * len(pit_values), variants=len(variants)):
+            self.baseline = _solve_variant(self.tyre_models, self.total_laps, self.max_stops, {},
+                                           [self.pit_loss])[0]
+            args = [(self.tyre_models, self.total_laps, self.max_stops, point, pit_values) for point in variants]
+            workers = min(self.max_workers or os.cpu_count() or 1, len(args))
+            if workers == 1:
+                results = [_solve_variant(*a) for a in args]
+            else:
+                # A variant takes milliseconds: ship them to the workers in batches
+                chunksize = max(1, len(args) // (4 * workers))
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(_solve_variant, *zip(*args), chunksize=chunksize))
+
+        base_time = self.baseline[0]
+        self.rows = []
+        for point, solved in zip(variants, results):
+            for pit, (time, stints) in zip(pit_values, solved):
+                values = dict(point, pit_loss=pit)
+                row = {name: values[name] for name in names}
+                row.update({
+                    'time': time,
+                    'delta': time - base_time,
+                    'stops': len(stints) - 1,
+                    'stints': stints,
+                })
+                self.rows.append(row)
+        return self.rows
+
+    @staticmethod
+    def write(rows, path):
+        """ Writes the table as CSV (stints JSON-encoded) or, for any other extension, JSON lines. """
+        with open(path, 'w', newline='') as f:
+            if not path.endswith('.csv'):
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+                return
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['time'])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(dict(row, stints=json.dumps(row['stints'])))
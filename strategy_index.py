@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import tempfile
+from itertools import combinations, product
+import numpy as np
+import config
+from instrumentation import recorder
+from optimizers import RaceModel, StintCostTable
+
+def legal_stint_tables(cost_table):
+    """ First / later stint costs with inf beyond MAX_LIFE: an over-limit stint is never legal. """
+    race_model = cost_table.race_model
+    n = np.arange(cost_table.total_laps + 1)
+    over = n[None, :] > race_model.max_life[:, None]
+    return (np.where(over, np.inf, cost_table.first_array),
+            np.where(over, np.inf, cost_table.later_array))
+
+def enumerate_strategies(cost_table, max_stops=config.STRATEGY_INDEX['MAX_STOPS'],
+                         chunk_size=config.STRATEGY_INDEX['CHUNK_SIZE']):
+    """
+    STRATEGY SPACE STREAM
+    Yields every legal 1..max_stops stop strategy (at least two compounds,
+    no stint beyond MAX_LIFE) in chunks of about `chunk_size` strategies:
+    (stops, compound codes (n, stops + 1), stint lengths (n, stops + 1), race times).
+    Each chunk is scored in one NumPy pass (split laps x compound sequences);
+    terms are added in the order of evaluate_population, so the times match it
+    bit-for-bit.
+    """
+    first, later = legal_stint_tables(cost_table)
+    L = cost_table.total_laps
+    n_comp = len(cost_table.compounds)
+    longest = int(cost_table.race_model.max_life.max())
+
+    for stops in range(1, max_stops + 1):
+        n_stints = stops + 1
+        # Compound sequences that satisfy the two-compound rule
+        seqs = np.array([s for s in product(range(n_comp), repeat=n_stints) if len(set(s)) > 1],
+                        dtype=np.intp).reshape(-1, n_stints)
+        # Stint lengths from the pit laps, dropping splits no compound could run
+        cuts = np.array(list(combinations(range(1, L), stops)), dtype=np.intp).reshape(-1, stops)
+        bounds = np.hstack([np.zeros((len(cuts), 1), dtype=np.intp), cuts, np.full((len(cuts), 1), L)])
+        splits = np.diff(bounds, axis=1)
+        splits = splits[(splits <= longest).all(axis=1)]
+        if not len(seqs) or not len(splits):
+            continue
+
+        rows = max(1, chunk_size // len(seqs))
+        for start in range(0, len(splits), rows):
+            laps = splits[start:start + rows]
+            # times[s, r]: compound sequence s on split r
+            times = first[seqs[:, 0][:, None], laps[:, 0][None, :]]
+            for col in range(1, n_stints):
+                times = times + cost_table.pit_loss
+                times = times + later[seqs[:, col][:, None], laps[:, col][None, :]]
+            s_idx, r_idx = np.nonzero(np.isfinite(times))
+            if len(s_idx):
+                yield (stops, seqs[s_idx].astype(np.int8), laps[r_idx].astype(np.int16), times[s_idx, r_idx])
+
+def _keep_best(best, comps, laps, times, top_k):
+    """ Merges a chunk into the running top-k (comps, laps, times) of a group. """
+    if best is not None:
+        comps = np.concatenate([best[0], comps])
+        laps = np.concatenate([best[1], laps])
+        times = np.concatenate([best[2], times])
+    if len(times) > top_k:
+        keep = np.argpartition(times, top_k - 1)[:top_k]
+        comps, laps, times = comps[keep], laps[keep], times[keep]
+    return comps, laps, times
+
+class StrategyIndex:
+    """
+    PRECOMPUTED STRATEGY LOOKUP
+    Exhaustive enumeration of the legal 1-3 stop strategies of a race, reduced
+    to the top-k per (stop count, starting compound) and stored as one sorted
+    NumPy record file (memory-mapped on open) + a JSON header with the group
+    offsets. Queries such as "best 2-stop starting on MEDIUM" are slices of
+    the mapped file: no optimizer is run.
+    Indexes built with for_race() are cached on disk by race parameters and
+    physics, so a race is enumerated only once.
+    """
+    DATA_SUFFIX = '.npy'
+    META_SUFFIX = '.json'
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + self.META_SUFFIX) as f:
+            self.meta = json.load(f)
+        self.records = np.load(path + self.DATA_SUFFIX, mmap_mode='r')
+        self.compounds = tuple(self.meta['compounds'])
+        self.groups = {(int(key.split(':')[0]), key.split(':')[1]): tuple(span)
+                       for key, span in self.meta['groups'].items()}
+
+    @staticmethod
+    def record_dtype(max_stops):
+        return np.dtype([('time', 'f8'), ('stops', 'i1'), ('start', 'i1'),
+                         ('comps', 'i1', (max_stops + 1,)), ('laps', 'i2', (max_stops + 1,))])
+
+    @classmethod
+    def build(cls, tyre_models, total_laps, pit_loss, path, top_k=config.STRATEGY_INDEX['TOP_K'],
+              max_stops=config.STRATEGY_INDEX['MAX_STOPS'], race_model=None):
+        """ Enumerates and scores the strategy space, writes the index at `path` (.npy + .json) and opens it. """
+        table = StintCostTable(tyre_models, total_laps, pit_loss, race_model=race_model)
+        with recorder.phase('strategy_index', laps=total_laps, max_stops=max_stops):
+            best = {}
+            enumerated = 0
+            for stops, comps, laps, times in enumerate_strategies(table, max_stops):
+                enumerated += len(times)
+                for k in range(len(table.compounds)):
+                    mask = comps[:, 0] == k
+                    if mask.any():
+                        best[stops, k] = _keep_best(best.get((stops, k)), comps[mask], laps[mask],
+                                                    times[mask], top_k)
+            recorder.count('strategies_enumerated', enumerated)
+
+        # --- SORTED RECORDS: (stops, starting compound), then race time ---
+        records = np.zeros(sum(len(b[2]) for b in best.values()), dtype=cls.record_dtype(max_stops))
+        groups = {}
+        offset = 0
+        for (stops, k), (comps, laps, times) in sorted(best.items()):
+            order = np.argsort(times, kind='stable')
+            end = offset + len(order)
+            chunk = records[offset:end]
+            chunk['time'] = times[order]
+            chunk['stops'] = stops
+            chunk['start'] = k
+            chunk['comps'][:, :stops + 1] = comps[order]
+            chunk['laps'][:, :stops + 1] = laps[order]
+            groups[f"{stops}:{table.compounds[k]}"] = [offset, end]
+            offset = end
+
+        meta = {
+            'compounds': list(table.compounds),
+            'total_laps': int(total_laps),
+            'pit_loss': float(pit_loss),
+            'top_k': int(top_k),
+            'max_stops': int(max_stops),
+            'enumerated': int(enumerated),
+            'groups': groups,
+        }
+        # Write next to the target and rename, so readers never see half an index
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=cls.DATA_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, records)
+            os.replace(tmp, path + cls.DATA_SUFFIX)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with open(path + cls.META_SUFFIX, 'w') as f:
+            json.dump(meta, f)
+        return cls(path)
+
+    @classmethod
+    def for_race(cls, tyre_models, total_laps, pit_loss, root=config.STRATEGY_INDEX['DIR'],
+                 top_k=config.STRATEGY_INDEX['TOP_K'], max_stops=config.STRATEGY_INDEX['MAX_STOPS']):
+        """ Opens the cached index of this race, building it on the first call. """
+        race_model = RaceModel(tyre_models, total_laps)
+        payload = json.dumps({
+            'models': {comp: {k: float(v) for k, v in m.items()} for comp, m in tyre_models.items()},
+            'total_laps': int(total_laps),
+            'pit_loss': float(pit_loss),
+            'top_k': int(top_k),
+            'max_stops': int(max_stops),
+            'physics': [race_model.max_life.tolist(), race_model.wear.tolist(),
+                        race_model.warmup.tolist(), race_model.penalties],
+        }, sort_keys=True)
+        path = os.path.join(root, hashlib.sha256(payload.encode('utf-8')).hexdigest())
+        if os.path.exists(path + cls.DATA_SUFFIX) and os.path.exists(path + cls.META_SUFFIX):
+            recorder.event('strategy_index_hit', path=path)
+            return cls(path)
+        return cls.build(tyre_models, total_laps, pit_loss, path, top_k, max_stops, race_model=race_model)
+
+    def best(self, stops=None, start=None, n=1):
+        """
+        The n fastest indexed strategies, optionally for a given stop count and /
+        or starting compound, as [{'time', 'stops', 'stints'}, ...].
+        """
+        spans = [span for (s, comp), span in self.groups.items()
+                 if (stops is None or s == stops) and (start is None or comp == start)]
+        if not spans:
+            return []
+        rows = np.concatenate([self.records[a:b][:n] for a, b in spans])
+        rows = rows[np.argsort(rows['time'], kind='stable')][:n]
+        return [{
+            'time': float(row['time']),
+            'stops': int(row['stops']),
+            'stints': [[self.compounds[c], int(l)]
+                       for c, l in zip(row['comps'][:row['stops'] + 1], row['laps'][:row['stops'] + 1])],
+        } for row in rows]
+
+    def summary(self):
+        """ Best time per (stop count, starting compound), e.g. {(2, 'MEDIUM'): 5412.3}. """
+        return {key: float(self.records[a]['time']) for key, (a, b) in sorted(self.groups.items()) if b > a}
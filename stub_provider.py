@@ -0,0 +1,120 @@
+import json
+import sys
+import tempfile
+import threading
+import zlib
+import numpy as np
+import pandas as pd
+
+# Championship rounds served by the stub (round 0 is pre-season testing)
+STUB_EVENTS = ['Alpha Grand Prix', 'Bravo Grand Prix', 'Charlie Grand Prix']
+
+class StubSession:
+    """ FastF1-like session: load() fills `laps` with a synthetic two-stint race. """
+    def __init__(self, provider, key, total_laps=50, pit_lap=20):
+        self.provider = provider
+        self.key = key
+        self.total_laps = total_laps
+        self.pit_lap = pit_lap
+        self.laps = None
+
+    def load(self, laps=True, telemetry=True, weather=True, messages=True):
+        self.provider._count_load(self.key)
+        # Seeded per session (crc32: stable across runs, unlike hash())
+        rng = np.random.default_rng(zlib.crc32(repr(self.key).encode()))
+        rows = []
+        for k, driver in enumerate(['AAA', 'BBB', 'CCC']):
+            for lap in range(1, self.total_laps + 1):
+                compound, age = ('MEDIUM', lap) if lap <= self.pit_lap else ('HARD', lap - self.pit_lap)
+                time = 90.0 + 0.3 * k + (0.06 if compound == 'MEDIUM' else 0.03) * age + rng.normal(0, 0.1)
+                in_lap, out_lap = lap == self.pit_lap, lap == self.pit_lap + 1
+                rows.append({
+                    'Driver': driver,
+                    'LapNumber': lap,
+                    'LapTime': pd.Timedelta(seconds=time + (11.0 if in_lap or out_lap else 0.0)),
+                    'Compound': compound,
+                    'TyreLife': float(age),
+                    'PitInTime': pd.Timedelta(minutes=lap) if in_lap else pd.NaT,
+                    'PitOutTime': pd.Timedelta(minutes=lap) if out_lap else pd.NaT,
+                    'TrackStatus': '1',
+                })
+        self.laps = pd.DataFrame(rows)
+
+class StubProvider:
+    """
+    OFFLINE SESSION PROVIDER
+    Stand-in for the fastf1 module (get_session / get_event_schedule) that
+    needs no network. `failures` maps (year, gp, session_type) to the number
+    of loads that raise ConnectionError before one succeeds, `garbled` to the
+    number that fail to decode the response (json.JSONDecodeError); an
+    unknown event raises ValueError like FastF1. `loads` counts the load()
+    calls per session.
+    """
+    def __init__(self, failures=None, garbled=None, events=STUB_EVENTS):
+        self.failures = dict(failures or {})
+        self.garbled = dict(garbled or {})
+        self.events = list(events)
+        self.loads = {}
+        self._lock = threading.Lock()
+
+    def get_event_schedule(self, year, include_testing=True):
+        names = self.events if not include_testing else ['Pre-Season Testing'] + self.events
+        first = 1 if not include_testing else 0
+        return pd.DataFrame({'RoundNumber': range(first, first + len(names)), 'EventName': names})
+
+    def get_session(self, year, gp, session_type):
+        if gp not in self.events:
+            raise ValueError(f"No event named '{gp}' in {year}")
+        return StubSession(self, (year, gp, session_type))
+
+    def _count_load(self, key):
+        with self._lock:
+            n = self.loads[key] = self.loads.get(key, 0) + 1
+        if n <= self.failures.get(key, 0):
+            raise ConnectionError(f"Stub timeout for {key}")
+        if n <= self.failures.get(key, 0) + self.garbled.get(key, 0):
+            raise json.JSONDecodeError("Unterminated string", '{"Laps": [', 10)
+
+def check():
+    """ Runs SessionPrefetcher against the stub: retries, permanent errors and model-cache hits. """
+    from prefetch import SessionPrefetcher
+    from model_cache import ModelCache
+
+    failures = []
+
+    def expect(label, ok):
+        print(f"[{'PASS' if ok else 'FAIL'}] {label}")
+        if not ok:
+            failures.append(label)
+
+    flaky, broken, garbled = [(2024, gp, 'R') for gp in STUB_EVENTS[1:]] + [(2025, STUB_EVENTS[0], 'R')]
+    provider = StubProvider(failures={flaky: 2, broken: 99}, garbled={garbled: 1})
+    cache = ModelCache(root=tempfile.mkdtemp(prefix='stub-cache-'), max_bytes=None)
+    prefetcher = SessionPrefetcher(provider=provider, cache=cache, max_workers=2, retries=3, backoff=0.0)
+
+    events = prefetcher.season_events([2024])
+    expect("schedule lists the championship rounds only", events == [(2024, gp) for gp in STUB_EVENTS])
+
+    rows = prefetcher.prefetch_events(events + [(2024, 'Nowhere Grand Prix')], session_types=('R',))
+    by_gp = {row['gp']: row for row in rows}
+    expect("clean session loads at the first attempt",
+           by_gp[STUB_EVENTS[0]]['status'] == 'ok' and by_gp[STUB_EVENTS[0]]['attempts'] == 1)
+    expect("transient failures are retried",
+           by_gp[flaky[1]]['status'] == 'ok' and by_gp[flaky[1]]['attempts'] == 3)
+    expect("retries stop after RETRIES + 1 attempts",
+           by_gp[broken[1]]['status'] == 'error' and by_gp[broken[1]]['attempts'] == 4)
+    expect("unknown events fail without retries",
+           by_gp['Nowhere Grand Prix']['status'] == 'error' and by_gp['Nowhere Grand Prix']['attempts'] == 1)
+    row = prefetcher.prefetch([garbled])[0]
+    expect("garbled responses are retried", row['status'] == 'ok' and row['attempts'] == 2)
+
+    loads = dict(provider.loads)
+    again = prefetcher.prefetch_events(events[:2], session_types=('R',))
+    expect("second run is served from the model cache",
+           all(row['from_cache'] for row in again) and provider.loads == loads)
+
+    print(f"\n{len(failures)} check(s) failed." if failures else "\nAll prefetch checks passed.")
+    return not failures
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,205 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import config
+from instrumentation import recorder
+from optimizers import (StintCostTable, StrategyIndividual, ExactSolver, FitnessCache, GA_OPERATORS,
+                        evaluate_population, population_to_arrays, stopping_reason, island_seed, crossover, mutate)
+
+class TeamIndividual:
+    """
+    TEAM CHROMOSOME
+    One StrategyIndividual per car, scored jointly: `car_times` are the
+    stand-alone race times and `fitness` the team total with interactions.
+    """
+    __slots__ = ('cars', 'fitness', 'car_times')
+
+    def __init__(self, cars):
+        self.cars = cars
+        self.fitness = 0.0
+        self.car_times = None
+
+    @property
+    def genes(self):
+        return [car.genes for car in self.cars]
+
+    def genome_key(self):
+        return tuple(car.genome_key() for car in self.cars)
+
+def stop_laps(population):
+    """ Laps at which each strategy stops, padded with -1: shape (individuals, max stops). """
+    _, laps, n_stints = population_to_arrays(population)
+    stops = np.cumsum(laps.astype(np.int64), axis=1)[:, :-1]
+    valid = np.arange(stops.shape[1]) < (n_stints - 1)[:, None]
+    return np.where(valid, stops, -1)
+
+def interaction_penalty(stops_a, stops_b, settings=config.TEAM_SETTINGS):
+    """
+    PIT WINDOW INTERACTIONS between two cars (vectorized over the population)
+    - same-lap stops queue in the pit box (double stack): SAME_LAP_PENALTY;
+    - stops one lap apart still lose time in the pit lane: ADJACENT_LAP_PENALTY;
+    - stops 2..UNDERCUT_WINDOW laps apart offset the cars (undercut / cover):
+      UNDERCUT_GAIN is credited.
+    """
+    both = (stops_a[:, :, None] >= 0) & (stops_b[:, None, :] >= 0)
+    gap = np.abs(stops_a[:, :, None] - stops_b[:, None, :])
+    same = (both & (gap == 0)).sum(axis=(1, 2))
+    adjacent = (both & (gap == 1)).sum(axis=(1, 2))
+    undercut = (both & (gap >= 2) & (gap <= settings['UNDERCUT_WINDOW'])).sum(axis=(1, 2))
+    return (same * settings['SAME_LAP_PENALTY'] + adjacent * settings['ADJACENT_LAP_PENALTY']
+            - undercut * settings['UNDERCUT_GAIN'])
+
+def evaluate_team(population, cost_tables, settings=config.TEAM_SETTINGS):
+    """
+    VECTORIZED TEAM OBJECTIVE
+    Each car is scored for the whole population in one evaluate_population
+    pass; the pairwise pit-window interactions are added on top.
+    Returns (team fitness, car times of shape (individuals, cars)).
+    """
+    n_cars = len(cost_tables)
+    car_times = np.empty((len(population), n_cars))
+    stops = []
+    for i, table in enumerate(cost_tables):
+        cars = [team.cars[i] for team in population]
+        car_times[:, i] = evaluate_population(cars, table)
+        stops.append(stop_laps(cars))
+
+    fitness = car_times.sum(axis=1)
+    for a in range(n_cars):
+        for b in range(a + 1, n_cars):
+            fitness = fitness + interaction_penalty(stops[a], stops[b], settings)
+    return fitness, car_times
+
+def _evolve_team(cost_tables, seeds, generations, pop_size, mutation_rate, settings, seed,
+                 stall_generations, time_budget, operators):
+    """
+    TEAM GA RUN (one independent run; executed in a worker process)
+    Joint population of paired genomes: per-car crossover and mutation use
+    the shared GA operators (optimizers.crossover / mutate), the team is
+    scored with evaluate_team.
+    Returns the best genes, fitness, car times and the best-fitness history.
+    """
+    random.seed(seed)
+
+    population = [TeamIndividual([StrategyIndividual(table, stints=g) for table, g in zip(cost_tables, genes)])
+                  for genes in seeds[:pop_size]]
+    while len(population) < pop_size:
+        population.append(TeamIndividual([StrategyIndividual(table) for table in cost_tables]))
+
+    cache = FitnessCache()
+    history = []
+    started = time.perf_counter()
+    for gen in range(generations):
+        # Only unseen team genomes are scored (one batched pass per car)
+        pending = {}
+        for team in population:
+            key = team.genome_key()
+            hit = cache.get(key)
+            if hit is None:
+                pending.setdefault(key, []).append(team)
+            else:
+                team.fitness, team.car_times = hit
+        if pending:
+            fitness, car_times = evaluate_team([group[0] for group in pending.values()], cost_tables, settings)
+            recorder.count('team_evals', len(pending))
+            for (key, group), f, times in zip(pending.items(), fitness.tolist(), car_times.tolist()):
+                cache.put(key, (f, times))
+                for team in group:
+                    team.fitness, team.car_times = f, times
+
+        population.sort(key=lambda t: t.fitness)
+        history.append(population[0].fitness)
+        if stopping_reason(history, time.perf_counter() - started, stall_generations, 0.0, time_budget):
+            break
+
+        next_gen = population[:2]
+        while len(next_gen) < pop_size:
+            p1 = min(random.sample(population, 3), key=lambda t: t.fitness)
+            p2 = min(random.sample(population, 3), key=lambda t: t.fitness)
+            cars = []
+            for c1, c2 in zip(p1.cars, p2.cars):
+                child = crossover(c1, c2, operators)
+                mutate(child, mutation_rate, operators)
+                cars.append(child)
+            next_gen.append(TeamIndividual(cars))
+        population = next_gen
+
+    best = population[0]
+    return best.genes, best.fitness, best.car_times, history
+
+class TeamOptimizer:
+    """
+    MULTI-CAR STRATEGY OPTIMIZER
+    Joint GA over the strategies of 2-4 cars that share the pit box. The
+    search space grows with the power of the number of cars, so:
+    - the team objective is batched (one NumPy pass per car + vectorized
+      pairwise interactions) and memoized by joint genome;
+    - `runs` independent GA runs are spread over a process pool and the best
+      team is kept;
+    - every run is seeded with the independent optimum of each car
+      (ExactSolver), so the joint plan is never worse than planning each car
+      in isolation.
+    """
+    def __init__(self, car_models, total_laps, pit_loss=config.DEFAULT_PIT_LOSS,
+                 pop_size=config.TEAM_SETTINGS['POP_SIZE'],
+                 generations=config.TEAM_SETTINGS['GENERATIONS'],
+                 mutation_rate=config.TEAM_SETTINGS['MUTATION_RATE'],
+                 runs=config.TEAM_SETTINGS['RUNS'],
+                 max_workers=config.TEAM_SETTINGS['WORKERS'],
+                 stall_generations=config.TEAM_SETTINGS['STALL_GENERATIONS'],
+                 time_budget=config.TEAM_SETTINGS['TIME_BUDGET'],
+                 operators=config.TEAM_SETTINGS['OPERATORS'],
+                 settings=config.TEAM_SETTINGS):
+        if not 2 <= len(car_models) <= 4:
+            raise ValueError(f"TeamOptimizer plans 2 to 4 cars, got {len(car_models)}")
+        if operators not in GA_OPERATORS:
+            raise ValueError(f"Unknown GA operators '{operators}' (choose from {GA_OPERATORS})")
+        self.car_models = list(car_models)      # One tyre_models dict per car (e.g. per-driver fits)
+        self.total_laps = total_laps
+        self.pit_loss = pit_loss
+        self.pop_size = pop_size
+        self.generations = generations
+        self.mutation_rate = mutation_rate
+        self.runs = runs
+        self.max_workers = max_workers
+        self.stall_generations = stall_generations
+        self.time_budget = time_budget
+        self.operators = operators
+        self.settings = dict(settings)
+        self.cost_tables = [StintCostTable(models, total_laps, pit_loss) for models in self.car_models]
+        self.best_history = []
+        self.independent = None
+
+    def solve_independent(self):
+        """ Each car's own optimum (ExactSolver) and the joint score of that plan. """
+        genes = [ExactSolver(models, self.total_laps, pit_loss=self.pit_loss, cost_table=table).solve()[1]
+                 for models, table in zip(self.car_models, self.cost_tables)]
+        return self.score(genes), genes
+
+    def score(self, genes):
+        """ Team fitness and car times of one joint plan ([[compound, laps], ...] per car). """
+        team = TeamIndividual([StrategyIndividual(t, stints=g) for t, g in zip(self.cost_tables, genes)])
+        fitness, car_times = evaluate_team([team], self.cost_tables, self.settings)
+        return float(fitness[0]), car_times[0].tolist()
+
+    def run(self):
+        """ Returns (team fitness, per-car genes, per-car times) of the best joint plan. """
+        with recorder.phase('team', cars=len(self.car_models), runs=self.runs):
+            (independent_fitness, _), independent_genes = self.solve_independent()
+            self.independent = (independent_fitness, independent_genes)
+            args = [(self.cost_tables, [independent_genes], self.generations, self.pop_size,
+                     self.mutation_rate, self.settings, island_seed(run, 0), self.stall_generations,
+                     self.time_budget, self.operators) for run in range(self.runs)]
+
+            if self.runs == 1 or self.max_workers == 1:
+                results = [_evolve_team(*a) for a in args]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = list(executor.map(_evolve_team, *zip(*args)))
+
+        genes, fitness, car_times, _ = min(results, key=lambda r: r[1])
+        # Best run at every generation (runs that stopped early keep their last value)
+        longest = max(len(r[3]) for r in results)
+        self.best_history = [min(r[3][min(g, len(r[3]) - 1)] for r in results) for g in range(longest)]
+        return fitness, genes, car_times
@@ -1,12 +1,21 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+def _pyplot():
+    """ Matplotlib on the non-interactive Agg backend: charts go to file, also on headless nodes. """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
-def plot_results(history, greedy_time, greedy_stints, ga_stints, race_gp, year):
+def plot_results(history, greedy_time, greedy_stints, ga_stints, race_gp, year, output=None, alternatives=None):
     """
     Generates a dashboard with two panels:
     1. Convergence Evolution (Genetic Algorithm improvement over generations).
     2. Strategy Comparison (Gantt chart showing tyre usage).
+    `alternatives` ({label: stints}, e.g. strategy-index lookups) adds rows to the Gantt chart.
+    The chart is saved to `output` (default: <gp>_<year>_strategy.png) and the path is returned.
     """
+    plt = _pyplot()
+    output = output or f"{race_gp.replace(' ', '_')}_{year}_strategy.png"
+
     # Setup the figure with 2 subplots (Convergence + Strategy)
     fig = plt.figure(figsize=(12, 10))
     gs = fig.add_gridspec(2, 1, height_ratios=[1, 1], hspace=0.3)
@@ -35,7 +44,7 @@ def plot_results(history, greedy_time, greedy_stints, ga_stints, race_gp, year):
     color = 'green' if gain > 0 else 'red'
     ax1.annotate(f"Strategic Gain: {gain:.2f}s", 
                  xy=(len(history)-1, best_time), 
-                 xytext=(len(history)-15, best_time - (gain/2 if gain > 0 else -10)),
+                 xytext=(max(0, len(history) - 15), best_time - (gain/2 if gain > 0 else -10)),
                  arrowprops=dict(facecolor=color, shrink=0.05),
                  fontsize=12, color=color, fontweight='bold')
 
@@ -66,13 +75,74 @@ def plot_results(history, greedy_time, greedy_stints, ga_stints, race_gp, year):
     # Plot both strategies
     max_laps_g = draw_strategy_bar(ax2, 10, greedy_stints, "Greedy")
     max_laps_ga = draw_strategy_bar(ax2, 24, ga_stints, "Genetic")
+    ticks, labels = [14, 28], ['Greedy (Local Opt)', 'Genetic (Global Opt)']
+    max_laps = max(max_laps_g, max_laps_ga)
+    for i, (label, stints) in enumerate((alternatives or {}).items()):
+        max_laps = max(max_laps, draw_strategy_bar(ax2, 38 + 14 * i, stints, label))
+        ticks.append(42 + 14 * i)
+        labels.append(label)
     
-    ax2.set_yticks([14, 28])
-    ax2.set_yticklabels(['Greedy (Local Opt)', 'Genetic (Global Opt)'], fontsize=12, fontweight='bold')
+    ax2.set_yticks(ticks)
+    ax2.set_yticklabels(labels, fontsize=12, fontweight='bold')
     ax2.set_xlabel("Lap Number", fontsize=12)
     ax2.set_title("Strategy Comparison: Stints & Compounds", fontsize=14, fontweight='bold')
-    ax2.set_xlim(0, max(max_laps_g, max_laps_ga) + 2)
+    ax2.set_xlim(0, max_laps + 2)
     ax2.grid(True, axis='x', alpha=0.3)
 
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    fig.savefig(output, dpi=120)
+    plt.close(fig)
+    return output
+
+def plot_sensitivity(rows, x, y, race_gp, year, output=None, where=None):
+    """
+    Heatmap of the optimal stop count over two sweep axes (SensitivitySweep rows).
+    Each cell shows the stop count and the delta to the unperturbed optimum;
+    thick lines mark where the optimal stop count flips. Other swept axes must
+    be fixed with `where` ({axis: value}).
+    The chart is saved to `output` (default: <gp>_<year>_sensitivity.png) and the path is returned.
+    """
+    plt = _pyplot()
+    from matplotlib.colors import ListedColormap, BoundaryNorm
+    output = output or f"{race_gp.replace(' ', '_')}_{year}_sensitivity.png"
+
+    rows = [r for r in rows if all(r.get(axis) == value for axis, value in (where or {}).items())]
+    xs = sorted({r[x] for r in rows})
+    ys = sorted({r[y] for r in rows})
+    cells = {}
+    for r in rows:
+        if (r[x], r[y]) in cells:
+            raise ValueError(f"Several rows per ({x}, {y}) cell: fix the other axes with `where`")
+        cells[r[x], r[y]] = r
+    if len(cells) != len(xs) * len(ys):
+        raise ValueError(f"The rows do not cover the full {x} x {y} grid")
+
+    stops = [[cells[vx, vy]['stops'] for vx in xs] for vy in ys]
+    fig, ax = plt.subplots(figsize=(max(6, 1.1 * len(xs) + 3), max(4, 0.7 * len(ys) + 2)))
+
+    # One colour per stop count (1-stop ... 4-stop)
+    colors = ListedColormap(['#9ecae1', '#fdd0a2', '#fc9272', '#bcbddc'])
+    ax.imshow(stops, cmap=colors, norm=BoundaryNorm([0.5, 1.5, 2.5, 3.5, 4.5], colors.N),
+              origin='lower', aspect='auto')
+    for j, vy in enumerate(ys):
+        for i, vx in enumerate(xs):
+            cell = cells[vx, vy]
+            ax.text(i, j, f"{cell['stops']}\n{cell['delta']:+.1f}s", ha='center', va='center', fontsize=8)
+            # Stop-count boundaries with the right and upper neighbours
+            if i + 1 < len(xs) and stops[j][i + 1] != stops[j][i]:
+                ax.plot([i + 0.5, i + 0.5], [j - 0.5, j + 0.5], color='black', linewidth=2.5)
+            if j + 1 < len(ys) and stops[j + 1][i] != stops[j][i]:
+                ax.plot([i - 0.5, i + 0.5], [j + 0.5, j + 0.5], color='black', linewidth=2.5)
+
+    ax.set_xticks(range(len(xs)))
+    ax.set_xticklabels([f"{v:g}" for v in xs])
+    ax.set_yticks(range(len(ys)))
+    ax.set_yticklabels([f"{v:g}" for v in ys])
+    ax.set_xlabel(x, fontsize=12)
+    ax.set_ylabel(y, fontsize=12)
+    ax.set_title(f"Optimal Stop Count: {race_gp} {year}", fontsize=14, fontweight='bold')
+
+    plt.tight_layout()
+    fig.savefig(output, dpi=120)
+    plt.close(fig)
+    return output